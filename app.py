@@ -1,7 +1,7 @@
 import os
 from flask import Flask, request, jsonify, redirect, url_for
 from extensions import db
-from flask_security import Security, SQLAlchemyUserDatastore, hash_password
+from flask_security import Security
 from flask_migrate import Migrate
 
 
@@ -22,6 +22,28 @@ def create_app():
         "pool_size": 3,
         "max_overflow": 2,
     }
+    # Seconds the dashboard KPIs are served from cache (services/stats.py)
+    app.config["STATS_CACHE_TTL"] = int(os.environ.get("STATS_CACHE_TTL", 30))
+    # Seconds a list total is reused in cursor-paginated responses (services/pagination.py)
+    app.config["COUNT_CACHE_TTL"] = int(os.environ.get("COUNT_CACHE_TTL", 60))
+    # Seconds a user's identity (row + roles) is served from the in-process cache (datastore.py)
+    app.config["IDENTITY_CACHE_TTL"] = int(os.environ.get("IDENTITY_CACHE_TTL", 60))
+    # Open visits older than this are closed by the attendance sweeper (services/attendance.py)
+    app.config["ATTENDANCE_MAX_VISIT_HOURS"] = float(os.environ.get("ATTENDANCE_MAX_VISIT_HOURS", 4))
+    # Seconds a worker trusts its occupancy count before re-reading it (services/occupancy.py)
+    app.config["OCCUPANCY_RECONCILE_SECONDS"] = int(os.environ.get("OCCUPANCY_RECONCILE_SECONDS", 10))
+    # Max lifetime of one admin event SSE connection, which also carries occupancy (routes/payment_routes.py)
+    app.config["ADMIN_EVENTS_STREAM_SECONDS"] = int(os.environ.get("ADMIN_EVENTS_STREAM_SECONDS", 300))
+    # Open event streams + long-polls per worker; each holds a thread, keep it below the
+    # gunicorn.conf.py thread count
+    app.config["ADMIN_EVENTS_MAX_WAITERS"] = int(os.environ.get("ADMIN_EVENTS_MAX_WAITERS", 4))
+    # Run the maintenance jobs (services/scheduler.py) in a thread of this process
+    app.config["SCHEDULER_ENABLED"] = os.environ.get("SCHEDULER_ENABLED", "0") == "1"
+    app.config["SCHEDULER_TICK_SECONDS"] = int(os.environ.get("SCHEDULER_TICK_SECONDS", 60))
+    # Let workers run the bootstrap themselves when the stamp is missing (local SQLite only by default)
+    app.config["AUTO_BOOTSTRAP"] = os.environ.get(
+        "AUTO_BOOTSTRAP", "1" if db_url.startswith("sqlite") else "0"
+    ) == "1"
 
     # ── Flask-Security config ──────────────────────────────────────────────────
     app.config["SECURITY_PASSWORD_HASH"]              = "bcrypt"
@@ -35,18 +57,20 @@ def create_app():
     app.config["SECURITY_SEND_PASSWORD_CHANGE_EMAIL"] = False
     app.config["SECURITY_SEND_PASSWORD_RESET_EMAIL"]  = False
     app.config["SECURITY_TOKEN_AUTHENTICATION_HEADER"]= ""
+    app.config["SECURITY_JOIN_USER_ROLES"]            = True   # roles come with the user-loader query
     app.config["SECURITY_CSRF_IGNORE_UNAUTH_ENDPOINTS"] = True
     app.config["WTF_CSRF_ENABLED"]                    = False
     app.config["SECURITY_CSRF_PROTECT_MECHANISMS"]    = []
 
     # ── Extensions ─────────────────────────────────────────────────────────────
     db.init_app(app)
-    Migrate(app, db)
+    Migrate(app, db, directory=os.path.join(app.root_path, "migrations"))
 
     # ── Flask-Security setup ───────────────────────────────────────────────────
     from models import User, Role
+    from datastore import CachedUserDatastore
 
-    user_datastore = SQLAlchemyUserDatastore(db, User, Role)
+    user_datastore = CachedUserDatastore(db, User, Role)
     security = Security(app, user_datastore)
 
     @security.unauthn_handler
@@ -66,110 +90,28 @@ def create_app():
     app.register_blueprint(admin_bp,   url_prefix="/api/admin")
     app.register_blueprint(payment_bp, url_prefix="/api/payment")
 
-    # ── DB init & seeding ──────────────────────────────────────────────────────
+    # ── CLI commands ───────────────────────────────────────────────────────────
+    from commands import register_commands
+    register_commands(app)
+
+    # ── Bootstrap check ────────────────────────────────────────────────────────
+    # Schema/seed work lives in `flask bootstrap`; a worker only checks the stamp.
     with app.app_context():
-        from sqlalchemy import inspect as sa_inspect
-
-        inspector = sa_inspect(db.engine)
-        if not inspector.get_table_names():
-            print("No tables found — initialising database...")
-            db.create_all()
-        else:
-            print("Database already initialised — skipping create_all()")
-
-        roles_def = {
-            "member":      "Basic member access",
-            "lead":        "Team lead",
-            "admin":       "Administrator",
-            "super_admin": "Super administrator",
-        }
-        for role_name, description in roles_def.items():
-            user_datastore.find_or_create_role(name=role_name, description=description)
-
-        if not user_datastore.find_user(email="admin@msfitness.com"):
-            admin_role = user_datastore.find_or_create_role(name="admin", description="Administrator")
-            user_datastore.create_user(
-                email="admin@msfitness.com",
-                password=hash_password("admin@123"),
-                roles=[admin_role],
-                username="admin",
-                phone="0000000000",
-            )
-
-        # Seed sample plans if none exist
-        from models import Plan
-        if Plan.query.count() == 0:
-            plans = [
-                Plan(name="Monthly",   duration_days=30,  price=999.0,  description="Full gym access for 1 month"),
-                Plan(name="Quarterly", duration_days=90,  price=2499.0, description="Full gym access for 3 months"),
-                Plan(name="Half Year", duration_days=180, price=4499.0, description="Full gym access for 6 months"),
-                Plan(name="Annual",    duration_days=365, price=7999.0, description="Full gym access for 1 year"),
-            ]
-            db.session.add_all(plans)
-
-        db.session.commit()
-
-        if db_url.startswith("postgresql"):
-            _auto_migrate_sqlite_to_pg(app)
+        from services import bootstrap
+        if not bootstrap.is_current():
+            if app.config["AUTO_BOOTSTRAP"]:
+                bootstrap.run(app, log=app.logger.info)
+            else:
+                app.logger.warning("Database bootstrap is out of date — run `flask bootstrap`.")
+
+    # ── Background jobs ────────────────────────────────────────────────────────
+    if app.config["SCHEDULER_ENABLED"]:
+        from services import scheduler
+        scheduler.start(app)
 
     return app
 
 
-def _auto_migrate_sqlite_to_pg(app):
-    import sqlite3
-    from sqlalchemy import text
-
-    sqlite_path = os.path.join(app.instance_path, "db.sqlite3")
-    if not os.path.exists(sqlite_path):
-        return
-
-    try:
-        with db.engine.connect() as conn:
-            pg_user_count = conn.execute(text('SELECT COUNT(*) FROM "user"')).scalar()
-        if pg_user_count and pg_user_count > 0:
-            app.logger.info("PostgreSQL already has data — skipping migration.")
-            return
-    except Exception as exc:
-        app.logger.warning(f"Could not check PG user count: {exc}")
-        return
-
-    try:
-        src = sqlite3.connect(sqlite_path)
-        src.row_factory = sqlite3.Row
-        sqlite_user_count = src.execute("SELECT COUNT(*) FROM user").fetchone()[0]
-        if sqlite_user_count == 0:
-            src.close()
-            return
-    except Exception as exc:
-        app.logger.warning(f"Could not read SQLite source: {exc}")
-        return
-
-    tables = ["role","user","roles_users","admin","member","lead",
-              "plan","subscription","attendance","transaction"]
-
-    app.logger.info(f"Auto-migrating {sqlite_user_count} users SQLite → PostgreSQL...")
-    for table in tables:
-        try:
-            rows = src.execute(f"SELECT * FROM [{table}]").fetchall()
-        except Exception:
-            continue
-        if not rows:
-            continue
-        col_names   = list(rows[0].keys())
-        placeholders= ", ".join(f":{c}" for c in col_names)
-        col_list    = ", ".join(f'"{c}"' for c in col_names)
-        insert_sql  = text(f'INSERT INTO "{table}" ({col_list}) VALUES ({placeholders}) ON CONFLICT DO NOTHING')
-        try:
-            with db.engine.begin() as conn:
-                for row in rows:
-                    conn.execute(insert_sql, dict(row))
-            app.logger.info(f"  ✓ {table}: {len(rows)} rows")
-        except Exception as exc:
-            app.logger.error(f"  ✗ {table}: {exc}")
-    src.close()
-    app.logger.info("Migration complete!")
-
-
 app = create_app()
 
 if __name__ == "__main__":
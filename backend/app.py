@@ -3,10 +3,12 @@ MS Power Fitness - Flask Backend Application
 Complete REST API with Flask-Security-Too integration
 """
 from flask import Flask, jsonify, request
+import click
 from flask_cors import CORS
 from flask_security import Security, SQLAlchemyUserDatastore, auth_required, current_user, hash_password
 from datetime import datetime, timedelta, date
 from models import db, User, Role, Plan, Membership, Payment
+import projections
 import os
 from functools import wraps
 
@@ -177,11 +179,6 @@ def login():
     if not user.active:
         return jsonify({'error': 'Account is deactivated'}), 401
     
-    # Update membership statuses before login
-    for membership in user.memberships:
-        membership.update_status()
-    db.session.commit()
-    
     token = user.get_auth_token()
     is_admin = user.has_role('admin')
     is_manager = user.has_role('manager')
@@ -203,11 +200,6 @@ def login():
 @auth_required()
 def get_current_user():
     """Get current user info"""
-    # Update membership status
-    for membership in current_user.memberships:
-        membership.update_status()
-    db.session.commit()
-    
     membership = current_user.current_membership
     is_admin = current_user.has_role('admin')
     is_manager = current_user.has_role('manager')
@@ -227,7 +219,7 @@ def get_current_user():
             'plan': membership.plan.name if membership else None,
             'end_date': membership.end_date.isoformat() if membership else None,
             'days_remaining': current_user.days_until_expiry if membership else None,
-            'status': membership.status if membership else 'No Membership'
+            'status': membership.current_status if membership else 'No Membership'
         } if membership else None
     }), 200
 
@@ -251,11 +243,6 @@ def get_profile():
     """Get user's own profile"""
     user = current_user
     
-    # Update membership status
-    for membership in user.memberships:
-        membership.update_status()
-    db.session.commit()
-    
     membership = user.current_membership
     
     return jsonify({
@@ -270,7 +257,7 @@ def get_profile():
             'plan': membership.plan.name if membership else None,
             'end_date': membership.end_date.isoformat() if membership else None,
             'days_remaining': user.days_until_expiry if membership else None,
-            'status': membership.status if membership else 'No Membership'
+            'status': membership.current_status if membership else 'No Membership'
         } if membership else None
     }), 200
 
@@ -315,11 +302,6 @@ def get_user_details(user_id):
     """Get user details (Admin/Manager can view any user)"""
     user = User.query.get_or_404(user_id)
     
-    # Update membership status
-    for membership in user.memberships:
-        membership.update_status()
-    db.session.commit()
-    
     membership = user.current_membership
     
     # Get all memberships history
@@ -328,7 +310,7 @@ def get_user_details(user_id):
         'plan': m.plan.name,
         'start_date': m.start_date.isoformat(),
         'end_date': m.end_date.isoformat(),
-        'status': m.status
+        'status': m.current_status
     } for m in user.memberships.order_by(Membership.created_at.desc()).all()]
     
     # Get payment history
@@ -358,7 +340,7 @@ def get_user_details(user_id):
             'start_date': membership.start_date.isoformat() if membership else None,
             'end_date': membership.end_date.isoformat() if membership else None,
             'days_remaining': user.days_until_expiry if membership else None,
-            'status': membership.status if membership else 'No Membership'
+            'status': membership.current_status if membership else 'No Membership'
         } if membership else None,
         'memberships_history': memberships_history,
         'payments_history': payments_history
@@ -420,14 +402,38 @@ def get_all_members():
     dob_from = request.args.get('dob_from', '').strip()
     dob_to = request.args.get('dob_to', '').strip()
     
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor', '').strip()
+    if limit is not None:
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
+        limit = min(limit, 100)
+    
+    # Current membership per user (latest-ending 'Active' one, as in
+    # User.current_membership), picked with a window function
+    ranked = db.select(
+        Membership.user_id,
+        Membership.plan_id,
+        Membership.end_date,
+        Membership.current_status.label('status'),
+        db.func.row_number().over(
+            partition_by=Membership.user_id,
+            order_by=Membership.end_date.desc()
+        ).label('rn')
+    ).where(Membership.current_status == 'Active').subquery()
+    current = db.select(ranked, Plan.name.label('plan_name')).join(
+        Plan, Plan.id == ranked.c.plan_id
+    ).where(ranked.c.rn == 1).subquery()
+    
     # Base query - only members
-    member_role = Role.query.filter_by(name='member').first()
-    query = User.query.filter(User.roles.contains(member_role))
+    query = db.select(User, current.c.plan_name, current.c.status, current.c.end_date).outerjoin(
+        current, current.c.user_id == User.id
+    ).where(User.roles.any(Role.name == 'member'))
     
     # Search by name, email, or phone
     if search:
         search_pattern = f'%{search}%'
-        query = query.filter(
+        query = query.where(
             db.or_(
                 User.name.ilike(search_pattern),
                 User.email.ilike(search_pattern),
@@ -437,39 +443,54 @@ def get_all_members():
     
     # Filter by gender
     if gender_filter:
-        query = query.filter(User.gender == gender_filter)
+        query = query.where(User.gender == gender_filter)
     
     # Filter by date of birth range
     if dob_from:
         try:
             dob_from_date = datetime.strptime(dob_from, '%Y-%m-%d').date()
-            query = query.filter(User.date_of_birth >= dob_from_date)
+            query = query.where(User.date_of_birth >= dob_from_date)
         except ValueError:
             pass
     
     if dob_to:
         try:
             dob_to_date = datetime.strptime(dob_to, '%Y-%m-%d').date()
-            query = query.filter(User.date_of_birth <= dob_to_date)
+            query = query.where(User.date_of_birth <= dob_to_date)
         except ValueError:
             pass
     
-    # Get users
-    users = query.order_by(User.created_at.desc()).all()
-    
-    # Filter by plan if specified
+    # Filter by current plan
     if plan_filter:
-        filtered_users = []
-        for user in users:
-            membership = user.current_membership
-            if membership and membership.plan.name == plan_filter:
-                filtered_users.append(user)
-        users = filtered_users
+        query = query.where(current.c.plan_name == plan_filter)
+    
+    # Keyset pagination: cursor is "<created_at iso>_<id>" of the last row seen
+    if cursor:
+        try:
+            created, last_id = cursor.rsplit('_', 1)
+            created, last_id = datetime.fromisoformat(created), int(last_id)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.where(db.or_(
+            User.created_at < created,
+            db.and_(User.created_at == created, User.id < last_id)
+        ))
+    
+    query = query.order_by(User.created_at.desc(), User.id.desc())
+    if limit:
+        query = query.limit(limit + 1)
+    rows = db.session.execute(query).all()
+    
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].User
+        next_cursor = f'{last.created_at.isoformat()}_{last.id}'
     
     # Build response
+    today = datetime.utcnow().date()
     members_list = []
-    for user in users:
-        membership = user.current_membership
+    for user, plan_name, status, end_date in rows:
         members_list.append({
             'id': user.id,
             'name': user.name,
@@ -478,16 +499,17 @@ def get_all_members():
             'phone': user.phone,
             'date_of_birth': user.date_of_birth.isoformat() if user.date_of_birth else None,
             'gender': user.gender,
-            'current_plan': membership.plan.name if membership else 'No Plan',
-            'membership_status': membership.status if membership else 'Expired',
-            'end_date': membership.end_date.isoformat() if membership else None,
-            'days_remaining': user.days_until_expiry if membership else None,
+            'current_plan': plan_name or 'No Plan',
+            'membership_status': status or 'Expired',
+            'end_date': end_date.isoformat() if end_date else None,
+            'days_remaining': (end_date - today).days if end_date else None,
             'created_at': user.created_at.isoformat()
         })
     
     return jsonify({
         'members': members_list,
-        'count': len(members_list)
+        'count': len(members_list),
+        'next_cursor': next_cursor
     }), 200
 
 @app.route('/api/admin/managers', methods=['POST'])
@@ -988,25 +1010,16 @@ def admin_renew_membership(user_id):
 def get_business_projections():
     """Calculate business projections (Admin)"""
     today = date.today()
-    
-    # Next 30 days expiring
-    thirty_days_later = today + timedelta(days=30)
-    expiring_memberships = Membership.query.filter(
-        Membership.status.in_(['Active', 'Expiring']),
-        Membership.end_date >= today,
-        Membership.end_date <= thirty_days_later
-    ).all()
-    
-    expected_revenue = sum(m.plan.price for m in expiring_memberships)
+    forecast = projections.project(today)
     
     # Last 30 days actual revenue
     thirty_days_ago = today - timedelta(days=30)
-    last_month_payments = Payment.query.filter(
-        Payment.status == 'Approved',
-        Payment.date >= thirty_days_ago
-    ).all()
-    
-    last_month_revenue = sum(p.amount for p in last_month_payments)
+    last_month_revenue = db.session.execute(
+        db.select(db.func.coalesce(db.func.sum(Payment.amount), 0.0)).where(
+            Payment.status == 'Approved',
+            Payment.date >= thirty_days_ago
+        )
+    ).scalar()
     
     # Calculate quarterly and annual projections
     monthly_avg = last_month_revenue
@@ -1030,11 +1043,14 @@ def get_business_projections():
     }
     
     return jsonify({
-        'next_month_expected': expected_revenue,
-        'expiring_count': len(expiring_memberships),
+        'next_month_expected': forecast['revenue']['30_days'],
+        'expiring_count': forecast['expiring']['30_days'],
         'last_month_actual': last_month_revenue,
         'monthly_average': monthly_avg,
-        'scenarios': scenarios
+        'scenarios': scenarios,
+        'projected_revenue': forecast['revenue'],
+        'expiring': forecast['expiring'],
+        'renewal_rates': forecast['renewal_rates']
     }), 200
 
 # ============================================================================
@@ -1061,13 +1077,38 @@ def get_stats():
 
 # Background task to update membership statuses
 @app.cli.command('update-statuses')
-def update_membership_statuses():
+@click.option('--dry-run', is_flag=True, help='Report transitions without writing')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows per id range')
+def update_membership_statuses(dry_run, chunk_size):
     """CLI command to update all membership statuses"""
-    memberships = Membership.query.all()
-    for membership in memberships:
-        membership.update_status()
-    db.session.commit()
-    print(f"Updated {len(memberships)} membership statuses")
+    changed = db.or_(Membership.status.is_(None), Membership.status != Membership.current_status)
+    
+    if dry_run:
+        transitions = db.session.execute(
+            db.select(Membership.status, Membership.current_status, db.func.count())
+            .where(changed)
+            .group_by(Membership.status, Membership.current_status)
+        ).all()
+        for old, new, count in transitions:
+            print(f"{old} -> {new}: {count}")
+        print(f"Would update {sum(t[2] for t in transitions)} membership statuses")
+        return
+    
+    low, high = db.session.execute(
+        db.select(db.func.min(Membership.id), db.func.max(Membership.id))
+    ).one()
+    updated = 0
+    if low is not None:
+        for start in range(low, high + 1, chunk_size):
+            result = db.session.execute(
+                db.update(Membership)
+                .where(Membership.id.between(start, start + chunk_size - 1), changed)
+                .values(status=Membership.current_status)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            updated += result.rowcount
+    print(f"Updated {updated} membership statuses")
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
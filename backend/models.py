@@ -4,6 +4,7 @@ SQLAlchemy models for gym management system
 """
 from flask_sqlalchemy import SQLAlchemy
 from flask_security import UserMixin, RoleMixin, verify_and_update_password
+from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime, timedelta
 
 db = SQLAlchemy()
@@ -55,7 +56,7 @@ class User(db.Model, UserMixin):
     @property
     def current_membership(self):
         """Get the current active membership"""
-        return self.memberships.filter_by(status='Active').order_by(
+        return self.memberships.filter(Membership.current_status == 'Active').order_by(
             Membership.end_date.desc()
         ).first()
     
@@ -118,15 +119,28 @@ class Membership(db.Model):
         delta = self.end_date - datetime.utcnow().date()
         return 0 <= delta.days <= 7
     
-    def update_status(self):
-        """Update membership status based on dates"""
+    @hybrid_property
+    def current_status(self):
+        """Status as of today, derived from end_date (no write needed)"""
         today = datetime.utcnow().date()
         if self.end_date < today:
-            self.status = 'Expired'
-        elif (self.end_date - today).days <= 7:
-            self.status = 'Expiring'
-        else:
-            self.status = 'Active'
+            return 'Expired'
+        if (self.end_date - today).days <= 7:
+            return 'Expiring'
+        return 'Active'
+    
+    @current_status.expression
+    def current_status(cls):
+        today = datetime.utcnow().date()
+        return db.case(
+            (cls.end_date < today, 'Expired'),
+            (cls.end_date <= today + timedelta(days=7), 'Expiring'),
+            else_='Active'
+        )
+    
+    def update_status(self):
+        """Update the stored status column from current_status"""
+        self.status = self.current_status
     
     def __repr__(self):
         return f'<Membership {self.user_display_name} - {self.plan.name} until {self.end_date}>'
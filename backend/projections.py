@@ -0,0 +1,153 @@
+"""
+MS Power Fitness - Revenue Projections
+Renewal-aware revenue forecast for /api/admin/projections
+"""
+import threading
+from datetime import datetime, timedelta
+
+from models import db, Membership, Plan
+
+HORIZONS = (30, 90, 365)
+# A membership counts as renewed if the member's next one starts within this many days of its end
+GRACE_DAYS = 30
+# Fewer decided memberships than this and the rate falls back to the plan, then the whole gym
+MIN_SAMPLES = 5
+
+_lock = threading.Lock()
+_cache = {'day': None, 'rates': None}
+
+
+def _cohort(tenure):
+    """Tenure cohort of a user's n-th membership"""
+    return db.case((tenure == 1, 'new'), (tenure == 2, 'returning'), else_='loyal')
+
+
+def _next_cohort(cohort):
+    return 'returning' if cohort == 'new' else 'loyal'
+
+
+def _days_between(start, end):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return db.func.julianday(end) - db.func.julianday(start)
+    return end - start
+
+
+def _history(users=None):
+    """
+    Every membership with its tenure and the start of the member's next one (LEAD).
+    `users` (a select of user ids) limits the window to those members' histories.
+    """
+    order = (Membership.start_date, Membership.id)
+    stmt = db.select(
+        Membership.plan_id,
+        Membership.end_date,
+        db.func.row_number().over(partition_by=Membership.user_id, order_by=order).label('tenure'),
+        db.func.lead(Membership.start_date).over(partition_by=Membership.user_id, order_by=order).label('next_start')
+    )
+    if users is not None:
+        stmt = stmt.where(Membership.user_id.in_(users))
+    return stmt.subquery()
+
+
+def _load_rates(today):
+    """(plan_id, cohort) -> (decided, renewed), over memberships whose grace period has passed"""
+    history = _history()
+    cohort = _cohort(history.c.tenure).label('cohort')
+    renewed = db.case(
+        (db.and_(
+            history.c.next_start.isnot(None),
+            _days_between(history.c.end_date, history.c.next_start) <= GRACE_DAYS
+        ), 1),
+        else_=0
+    )
+    rows = db.session.execute(
+        db.select(history.c.plan_id, cohort, db.func.count(), db.func.sum(renewed))
+        .where(history.c.end_date < today - timedelta(days=GRACE_DAYS))
+        .group_by(history.c.plan_id, cohort)
+    ).all()
+    return {(plan_id, c): (decided, renewed or 0) for plan_id, c, decided, renewed in rows}
+
+
+def renewal_rates(today):
+    """Historical renewal counts, computed once per day per process"""
+    with _lock:
+        if _cache['day'] == today:
+            return _cache['rates']
+    rates = _load_rates(today)
+    with _lock:
+        _cache.update(day=today, rates=rates)
+    return rates
+
+
+def _rate(rates, plan_id, cohort):
+    """Renewal probability, pooling over cohorts and then plans when samples are thin"""
+    for keep in (lambda p, c: (p, c) == (plan_id, cohort), lambda p, c: p == plan_id, lambda p, c: True):
+        decided = renewed = 0
+        for (p, c), (d, r) in rates.items():
+            if keep(p, c):
+                decided += d
+                renewed += r
+        if decided >= MIN_SAMPLES:
+            return renewed / decided
+    # No usable history yet: assume everyone renews, as the old projection did
+    return renewed / decided if decided else 1.0
+
+
+def _upcoming(today, last_day):
+    """(plan_id, cohort, end_date, count) for each member's latest membership ending in the window"""
+    # Only members with a membership ending in the window can contribute, so
+    # number and LEAD just their histories instead of the whole table.
+    history = _history(
+        db.select(Membership.user_id).where(Membership.end_date.between(today, last_day))
+    )
+    cohort = _cohort(history.c.tenure).label('cohort')
+    return db.session.execute(
+        db.select(history.c.plan_id, cohort, history.c.end_date, db.func.count())
+        .where(
+            history.c.next_start.is_(None),
+            history.c.end_date >= today,
+            history.c.end_date <= last_day
+        )
+        .group_by(history.c.plan_id, cohort, history.c.end_date)
+    ).all()
+
+
+def project(today=None):
+    """
+    Expected renewal revenue for each horizon. Every upcoming expiry renews into
+    the same plan with its (plan, cohort) rate, and that renewal's own expiry is
+    followed the same way until the longest horizon.
+    """
+    today = today or datetime.utcnow().date()
+    last_day = today + timedelta(days=max(HORIZONS))
+    rates = renewal_rates(today)
+    plans = {p.id: p for p in Plan.query.all()}
+
+    revenue = dict.fromkeys(HORIZONS, 0.0)
+    expiring = dict.fromkeys(HORIZONS, 0)
+    for plan_id, cohort, end_date, count in _upcoming(today, last_day):
+        for h in HORIZONS:
+            if (end_date - today).days <= h:
+                expiring[h] += count
+        plan = plans.get(plan_id)
+        price, duration = (plan.price, max(plan.duration_days, 1)) if plan else (0.0, 1)
+        expected = float(count)
+        while end_date <= last_day:
+            expected *= _rate(rates, plan_id, cohort)
+            for h in HORIZONS:
+                if (end_date - today).days <= h:
+                    revenue[h] += expected * price
+            cohort = _next_cohort(cohort)
+            end_date += timedelta(days=duration)
+
+    return {
+        'revenue': {f'{h}_days': round(revenue[h], 2) for h in HORIZONS},
+        'expiring': {f'{h}_days': expiring[h] for h in HORIZONS},
+        'renewal_rates': [{
+            'plan': plans[plan_id].name if plan_id in plans else None,
+            'cohort': cohort,
+            'memberships': decided,
+            'renewed': renewed,
+            'rate': round(renewed / decided, 4) if decided else None
+        } for (plan_id, cohort), (decided, renewed) in sorted(rates.items())]
+    }
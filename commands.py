@@ -0,0 +1,113 @@
+import click
+from extensions import db
+
+
+def register_commands(app):
+    """Attach the maintenance CLI commands (`flask <name>`) to the app."""
+
+    @app.cli.command("bootstrap")
+    def bootstrap_db():
+        """Create/upgrade the schema, seed roles, admin and plans, and stamp the version."""
+        from services import bootstrap
+        bootstrap.run(app, log=click.echo)
+
+    @app.cli.command("rebuild-membership")
+    def rebuild_membership():
+        """Rebuild every member's current-membership snapshot from scratch."""
+        from models import Member
+        count = Member.rebuild_membership_snapshots()
+        db.session.commit()
+        click.echo(f"Rebuilt membership snapshot for {count} members")
+
+    @app.cli.command("backfill-revenue")
+    def backfill_revenue():
+        """Rebuild the revenue_daily rollup from all completed transactions."""
+        from services import revenue
+        count = revenue.backfill()
+        db.session.commit()
+        click.echo(f"revenue_daily rebuilt with {count} rows")
+
+    @app.cli.command("rebuild-search-index")
+    def rebuild_search_index():
+        """(Re)create the member search index for the configured database."""
+        from services import search_ddl
+        with db.engine.begin() as conn:
+            search_ddl.install(conn)
+        click.echo(f"Member search index installed for {db.engine.dialect.name}")
+
+    @app.cli.command("import-members")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--default-password", default=None, help="Password for rows without one.")
+    def import_members_cmd(path, default_password):
+        """Bulk-create members from a CSV or JSON file."""
+        import json
+        from services import member_import
+        with open(path, encoding="utf-8-sig") as fh:
+            if path.lower().endswith(".json"):
+                rows = json.load(fh)
+            else:
+                rows = member_import.parse_csv(fh.read())
+        report = member_import.import_members(
+            rows, default_password or member_import.DEFAULT_PASSWORD
+        )
+        for r in report["results"]:
+            if r["status"] == "error":
+                click.echo(f"  row {r['row']} ({r['username']}): {r['error']}")
+        click.echo(f"Imported {report['created']} members, {report['failed']} rows failed")
+
+    @app.cli.command("recompute-streaks")
+    def recompute_streaks():
+        """Rebuild every member's streak and last visit from attendance history."""
+        from services import streaks
+        count = streaks.recompute()
+        db.session.commit()
+        click.echo(f"Recomputed streaks for {count} members with visits")
+
+    @app.cli.command("decay-streaks")
+    def decay_streaks():
+        """Reset streaks of members who missed a day (run nightly)."""
+        from services import streaks
+        count = streaks.decay()
+        db.session.commit()
+        click.echo(f"Reset {count} lapsed streaks")
+
+    @app.cli.command("rebuild-attendance-bitmaps")
+    def rebuild_attendance_bitmaps():
+        """Recreate the per-member attendance bitmaps from the attendance table."""
+        from services import attendance_bitmap
+        count = attendance_bitmap.rebuild()
+        db.session.commit()
+        click.echo(f"Rebuilt {count} attendance bitmaps")
+
+    @app.cli.command("prune-admin-events")
+    @click.option("--days", default=7, show_default=True, help="Keep events newer than this.")
+    def prune_admin_events(days):
+        """Delete old rows from the admin event feed."""
+        from services import admin_events
+        count = admin_events.prune(days)
+        db.session.commit()
+        click.echo(f"Pruned {count} admin events")
+
+    @app.cli.command("sweep-attendance")
+    @click.option("--hours", type=float, default=None, help="Max visit length (default ATTENDANCE_MAX_VISIT_HOURS).")
+    @click.option("--midnight", is_flag=True, help="Close every visit opened before today (IST).")
+    def sweep_attendance(hours, midnight):
+        """Close stale open visits members forgot to check out of."""
+        from services import attendance, jobs
+        cutoff = attendance.stale_cutoff(hours or app.config["ATTENDANCE_MAX_VISIT_HOURS"], midnight)
+        run = jobs.run("attendance_sweep", "cli", attendance.sweep_stale, cutoff)
+        click.echo(f"Closed {run['rows_affected']} stale visits opened before {cutoff:%Y-%m-%d %H:%M} (run #{run['id']})")
+
+    @app.cli.command("expire-subscriptions")
+    def expire_subscriptions():
+        """Mark active subscriptions past their end date as expired."""
+        from services import expiry, jobs
+        run = jobs.run("subscription_expiry", "cli", expiry.expire_lapsed)
+        click.echo(f"Expired {run['rows_affected']} subscriptions (run #{run['id']})")
+
+    @app.cli.command("run-scheduler")
+    def run_scheduler():
+        """Run the maintenance job scheduler in the foreground."""
+        from services import scheduler
+        click.echo(f"Scheduler running every {app.config['SCHEDULER_TICK_SECONDS']}s (Ctrl+C to stop)")
+        scheduler.loop(app, log=click.echo)
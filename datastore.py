@@ -0,0 +1,158 @@
+"""
+Flask-Security user datastore with an in-process identity cache.
+
+The session user loader looks the user up by fs_uniquifier on every
+authenticated request. Snapshots of the User columns and roles are kept
+in a bounded LRU for IDENTITY_CACHE_TTL seconds. A hit is merged back into
+the session without a query, so the loaded User behaves like a normal
+persistent row: lazy relationships still work and edits are flushed.
+
+Code that changes a user's password, active flag, contact details or
+roles must call invalidate(user) before committing. That writes a new
+identity stamp to app_meta in the same transaction and drops the local
+entry once it commits. Each process re-reads the stamp (one primary-key
+read) at most every STAMP_CHECK_SECONDS and drops its whole cache when it
+has changed, so other workers see deactivations and password changes
+within that interval.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import current_app
+from flask_security import SQLAlchemyUserDatastore
+from sqlalchemy import event
+from sqlalchemy.orm import Session, attributes, make_transient_to_detached
+
+from extensions import db
+from models import AppMeta
+
+MAX_ENTRIES = 1024
+STAMP_KEY   = "identity_version"
+STAMP_CHECK_SECONDS = 2
+
+_cache = OrderedDict()   # fs_uniquifier -> (expires_at, user columns, [role columns])
+_lock  = threading.Lock()
+_stamp = {"value": None, "checked_at": None}   # identity stamp the cache contents were read under
+
+
+def _columns(obj):
+    return {c.key: getattr(obj, c.key) for c in obj.__mapper__.column_attrs}
+
+
+def _detached(model, values):
+    obj = model.__mapper__.class_manager.new_instance()
+    for key, value in values.items():
+        attributes.set_committed_value(obj, key, value)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def _insert():
+    if db.session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _bump_stamp():
+    """Write a new identity stamp in the current transaction."""
+    stmt = _insert()(AppMeta).values(key=STAMP_KEY, value=uuid.uuid4().hex)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=["key"], set_={"value": stmt.excluded.value}
+    ))
+
+
+def _check_stamp(ttl):
+    """Clear this process's cache if another process has bumped the stamp."""
+    now = time.monotonic()
+    with _lock:
+        checked_at = _stamp["checked_at"]
+        if checked_at is not None and now - checked_at < min(STAMP_CHECK_SECONDS, ttl):
+            return
+        _stamp["checked_at"] = now
+    value = db.session.execute(
+        db.select(AppMeta.value).where(AppMeta.key == STAMP_KEY)
+    ).scalar()
+    with _lock:
+        if value != _stamp["value"]:
+            _cache.clear()
+            _stamp["value"] = value
+
+
+def _forget(keys):
+    with _lock:
+        if None in keys:
+            _cache.clear()
+        else:
+            for key in keys:
+                _cache.pop(key, None)
+
+
+def invalidate(user=None):
+    """
+    Drop the cached identity of `user` (everyone if None) in every worker.
+    Call before committing: the stamp is written in the caller's transaction
+    and this worker's entry goes once it commits.
+    """
+    key = None if user is None else user.fs_uniquifier
+    _forget({key})
+    db.session.info.setdefault("identity_invalidated", set()).add(key)
+    _bump_stamp()
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed(session):
+    # Again after commit, in case a request re-cached the old row meanwhile.
+    keys = session.info.pop("identity_invalidated", None)
+    if keys:
+        _forget(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("identity_invalidated", None)
+
+
+class CachedUserDatastore(SQLAlchemyUserDatastore):
+
+    def find_user(self, case_insensitive=False, **kwargs):
+        ttl = current_app.config.get("IDENTITY_CACHE_TTL", 0)
+        if ttl <= 0 or case_insensitive or list(kwargs) != ["fs_uniquifier"]:
+            return super().find_user(case_insensitive, **kwargs)
+
+        _check_stamp(ttl)
+        key = kwargs["fs_uniquifier"]
+        with _lock:
+            entry = _cache.get(key)
+            if entry and entry[0] > time.monotonic():
+                _cache.move_to_end(key)
+            else:
+                entry = None
+        if entry:
+            return self._from_snapshot(entry[1], entry[2])
+
+        user = super().find_user(**kwargs)
+        if user is not None:
+            snapshot = (time.monotonic() + ttl, _columns(user), [_columns(r) for r in user.roles])
+            with _lock:
+                _cache[key] = snapshot
+                _cache.move_to_end(key)
+                while len(_cache) > MAX_ENTRIES:
+                    _cache.popitem(last=False)
+        return user
+
+    def _from_snapshot(self, user_values, role_values):
+        user = _detached(self.user_model, user_values)
+        attributes.set_committed_value(
+            user, "roles", [_detached(self.role_model, r) for r in role_values]
+        )
+        return db.session.merge(user, load=False)
+
+    def put(self, model):
+        # Committed by the caller together with the change itself.
+        if isinstance(model, self.user_model) and db.inspect(model).persistent:
+            invalidate(model)
+        return super().put(model)
@@ -0,0 +1,142 @@
+"""
+Print the query plan of each hot route query, with and without the
+secondary indexes from migrations 0003_hot_query_indexes and
+0007_attendance_open_unique.
+
+Usage:
+  python explain_queries.py            # plans against SUPABASE_DB_URL / local SQLite
+  python explain_queries.py --after    # only the plans with indexes in place
+
+The "before" plans are produced by dropping the indexes inside a
+transaction that is rolled back, so the database is left untouched.
+Run it against a copy with realistic volume (50k+ subscriptions) —
+on a near-empty table every planner picks a scan.
+"""
+
+import sys
+from datetime import date, datetime, timedelta
+
+from app import create_app
+from extensions import db
+from models import Member, User, Subscription, Transaction, Attendance, RevenueDaily
+from services import pagination, search as member_search, stats
+
+INDEXES = [
+    "ix_subscription_member_status_end",
+    "ix_subscription_status_created",
+    "ix_subscription_active_end",
+    "ix_transaction_status_date",
+    "ix_transaction_member_date",
+    "ix_attendance_member_checkin",
+    "uq_attendance_open",
+    "ix_member_join_date",
+    "ix_member_current_end_date",
+]
+
+
+def route_queries(sample_member_id):
+    today   = date.today()
+    members = db.select(Member.user_id, User.username).join(User, Member.user_id == User.id)
+    keyset  = (Member.join_date, Member.user_id)
+    search, rank = member_search.filter_members(members, "ram")
+    return {
+        "admin.list_members (keyset, first page)": (
+            members.order_by(*pagination.keyset_order(keyset)).limit(21)
+        ),
+        "admin.list_members (keyset, after cursor)": (
+            pagination.keyset_after(members, keyset, (datetime.combine(today, datetime.min.time()), sample_member_id))
+            .order_by(*pagination.keyset_order(keyset))
+            .limit(21)
+        ),
+        "admin.list_members (?q= search)": (
+            search.order_by(*([] if rank is None else [rank]), Member.join_date.desc()).limit(20)
+        ),
+        "admin.dashboard_stats / payment.payment_stats": stats.dashboard_query(),
+        "admin.revenue_daily": (
+            db.select(RevenueDaily)
+            .where(RevenueDaily.day.between(today - timedelta(days=29), today))
+            .order_by(RevenueDaily.day, RevenueDaily.mode, RevenueDaily.plan_id)
+        ),
+        "payment.list_pending": (
+            db.select(Subscription.id)
+            .where(Subscription.status == "pending")
+            .order_by(Subscription.created_at.asc())
+        ),
+        "payment.payment_history (status, keyset)": (
+            db.select(Transaction.id)
+            .where(Transaction.status == "completed")
+            .order_by(*pagination.keyset_order((Transaction.transaction_date, Transaction.id)))
+            .limit(21)
+        ),
+        "payment.member_payment_history": (
+            db.select(Transaction.id)
+            .where(Transaction.member_id == sample_member_id)
+            .order_by(Transaction.transaction_date.desc())
+        ),
+        "member.pending_subscription": (
+            db.select(Subscription.id)
+            .where(Subscription.member_id == sample_member_id, Subscription.status == "pending")
+            .order_by(Subscription.created_at.desc())
+            .limit(1)
+        ),
+        "member.check_in (open visit)": (
+            db.select(Attendance.id)
+            .where(Attendance.member_id == sample_member_id, Attendance.check_out_time.is_(None))
+            .limit(1)
+        ),
+        "member.attendance_history": (
+            db.select(Attendance.id)
+            .where(Attendance.member_id == sample_member_id)
+            .order_by(Attendance.check_in_time.desc())
+            .limit(30)
+        ),
+        "expired active subscriptions": (
+            db.select(db.func.count()).select_from(Subscription)
+            .where(Subscription.status == "active", Subscription.end_date < today)
+        ),
+    }
+
+
+def explain(conn, stmt):
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql}")]
+
+
+def print_plans(conn, queries, label):
+    print(f"\n==== {label} ====")
+    for name, stmt in queries.items():
+        print(f"\n-- {name}")
+        for line in explain(conn, stmt):
+            print(f"   {line}")
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        sample = db.session.execute(db.select(Member.user_id).limit(1)).scalar() or 1
+        queries = route_queries(sample)
+
+        with db.engine.connect() as conn:
+            if "--after" not in sys.argv:
+                trans = conn.begin()
+                if conn.dialect.name == "sqlite":
+                    # pysqlite only opens a transaction before DML; a savepoint
+                    # makes the DROP INDEX statements below roll back cleanly.
+                    conn.exec_driver_sql("SAVEPOINT explain_before")
+                for name in INDEXES:
+                    conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+                try:
+                    print_plans(conn, queries, "BEFORE (without indexes)")
+                finally:
+                    if conn.dialect.name == "sqlite":
+                        conn.exec_driver_sql("ROLLBACK TO explain_before")
+                        conn.exec_driver_sql("RELEASE explain_before")
+                    trans.rollback()
+
+            print_plans(conn, queries, "AFTER (with indexes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Gunicorn settings, read automatically from the working directory.
+
+Admin dashboards hold a request thread open for the length of an event
+stream or long-poll (services/admin_events.py), so the workers must be
+threaded: a sync worker would be taken by a single dashboard.
+ADMIN_EVENTS_MAX_WAITERS must stay below `threads` so ordinary requests
+always have a thread left.
+"""
+import os
+
+bind         = os.environ.get("GUNICORN_BIND", "0.0.0.0:" + os.environ.get("PORT", "5000"))
+workers      = int(os.environ.get("WEB_CONCURRENCY", 4))
+worker_class = "gthread"
+threads      = int(os.environ.get("GUNICORN_THREADS", 8))
@@ -0,0 +1,28 @@
+"""baseline schema
+
+Marks the schema that `db.create_all()` produced before migrations were
+introduced. Existing databases should be stamped with this revision
+(`flask db stamp 0001_baseline`) and then upgraded.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
@@ -0,0 +1,65 @@
+"""member current-membership snapshot
+
+Revision ID: 0002_member_snapshot
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_member_snapshot'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    # Fresh databases get these columns from create_all(); only add what is missing.
+    existing = _columns("member")
+    if "current_subscription_id" not in existing:
+        op.add_column("member", sa.Column("current_subscription_id", sa.Integer(), nullable=True))
+        if op.get_bind().dialect.name != "sqlite":
+            op.create_foreign_key(
+                "fk_member_current_subscription", "member", "subscription",
+                ["current_subscription_id"], ["id"],
+            )
+    if "current_end_date" not in existing:
+        op.add_column("member", sa.Column("current_end_date", sa.Date(), nullable=True))
+    if "has_pending" not in existing:
+        op.add_column(
+            "member",
+            sa.Column("has_pending", sa.Boolean(), nullable=False, server_default=sa.false()),
+        )
+
+    op.execute("""
+        UPDATE member SET
+            current_subscription_id = (
+                SELECT s.id FROM subscription s
+                WHERE s.member_id = member.user_id AND s.status = 'active'
+                ORDER BY s.end_date DESC, s.id DESC LIMIT 1
+            ),
+            current_end_date = (
+                SELECT MAX(s.end_date) FROM subscription s
+                WHERE s.member_id = member.user_id AND s.status = 'active'
+            ),
+            has_pending = EXISTS (
+                SELECT 1 FROM subscription s
+                WHERE s.member_id = member.user_id AND s.status = 'pending'
+            )
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint("fk_member_current_subscription", "member", type_="foreignkey")
+    with op.batch_alter_table("member") as batch_op:
+        batch_op.drop_column("has_pending")
+        batch_op.drop_column("current_end_date")
+        batch_op.drop_column("current_subscription_id")
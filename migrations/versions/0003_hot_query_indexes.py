@@ -0,0 +1,50 @@
+"""indexes for hot query shapes
+
+Revision ID: 0003_hot_query_indexes
+Revises: 0002_member_snapshot
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_hot_query_indexes'
+down_revision = '0002_member_snapshot'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial WHERE clause or None)
+INDEXES = [
+    ("ix_subscription_member_status_end", "subscription", ["member_id", "status", "end_date"], None),
+    ("ix_subscription_status_created",    "subscription", ["status", "created_at"], None),
+    ("ix_subscription_active_end",        "subscription", ["end_date"], "status = 'active'"),
+    ("ix_transaction_status_date",        "transaction",  ["status", "transaction_date"], None),
+    ("ix_transaction_member_date",        "transaction",  ["member_id", "transaction_date"], None),
+    ("ix_attendance_member_checkin",      "attendance",   ["member_id", "check_in_time"], None),
+    ("ix_attendance_open",                "attendance",   ["member_id"], "check_out_time IS NULL"),
+    ("ix_member_join_date",               "member",       ["join_date"], None),
+    ("ix_member_current_end_date",        "member",       ["current_end_date"], None),
+]
+
+
+def _existing(table):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns, where in INDEXES:
+        if name in _existing(table):
+            continue
+        kw = {}
+        if where:
+            kw = {"postgresql_where": sa.text(where), "sqlite_where": sa.text(where)}
+        op.create_index(name, table, columns, **kw)
+
+
+def downgrade():
+    for name, table, _columns, _where in reversed(INDEXES):
+        if name in _existing(table):
+            op.drop_index(name, table_name=table)
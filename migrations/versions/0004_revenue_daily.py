@@ -0,0 +1,44 @@
+"""revenue_daily rollup
+
+Revision ID: 0004_revenue_daily
+Revises: 0003_hot_query_indexes
+Create Date: 2026-10-18 10:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_revenue_daily'
+down_revision = '0003_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "revenue_daily" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "revenue_daily",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("mode", sa.String(length=50), nullable=False),
+            sa.Column("plan_id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("txn_count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("day", "mode", "plan_id"),
+        )
+
+    op.execute("DELETE FROM revenue_daily")
+    op.execute("""
+        INSERT INTO revenue_daily (day, mode, plan_id, amount, txn_count)
+        SELECT date(t.transaction_date), t.mode, COALESCE(s.plan_id, 0),
+               SUM(t.amount), COUNT(*)
+        FROM "transaction" t
+        LEFT JOIN subscription s ON s.id = t.subscription_id
+        WHERE t.status = 'completed'
+        GROUP BY date(t.transaction_date), t.mode, COALESCE(s.plan_id, 0)
+    """)
+
+
+def downgrade():
+    op.drop_table("revenue_daily")
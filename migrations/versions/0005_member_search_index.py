@@ -0,0 +1,34 @@
+"""member search index (pg_trgm / FTS5)
+
+Revision ID: 0005_member_search_index
+Revises: 0004_revenue_daily
+Create Date: 2026-10-18 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from services import search_ddl
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_member_search_index'
+down_revision = '0004_revenue_daily'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    search_ddl.install(op.get_bind())
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute('DROP INDEX IF EXISTS ix_user_phone_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_user_username_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_member_name_trgm')
+    elif dialect == "sqlite":
+        for trigger in ("member_search_user_au", "member_search_ad", "member_search_au", "member_search_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS member_search")
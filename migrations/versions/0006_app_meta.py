@@ -0,0 +1,30 @@
+"""app_meta key/value table (bootstrap version stamp)
+
+Revision ID: 0006_app_meta
+Revises: 0005_member_search_index
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_app_meta'
+down_revision = '0005_member_search_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "app_meta" not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            "app_meta",
+            sa.Column("key", sa.String(length=64), nullable=False),
+            sa.Column("value", sa.String(length=255), nullable=False),
+            sa.PrimaryKeyConstraint("key"),
+        )
+
+
+def downgrade():
+    op.drop_table("app_meta")
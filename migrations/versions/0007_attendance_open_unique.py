@@ -0,0 +1,53 @@
+"""one open attendance row per member (partial unique index)
+
+Revision ID: 0007_attendance_open_unique
+Revises: 0006_app_meta
+Create Date: 2026-10-18 12:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_attendance_open_unique'
+down_revision = '0006_app_meta'
+branch_labels = None
+depends_on = None
+
+WHERE = "check_out_time IS NULL"
+
+
+def _existing():
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes("attendance")}
+
+
+def upgrade():
+    # Racing check-ins may have left several open rows for one member:
+    # keep the newest open, close the others as zero-length visits.
+    op.execute("""
+        UPDATE attendance SET check_out_time = check_in_time
+        WHERE check_out_time IS NULL
+          AND id NOT IN (
+              SELECT MAX(id) FROM attendance WHERE check_out_time IS NULL GROUP BY member_id
+          )
+    """)
+    existing = _existing()
+    if "ix_attendance_open" in existing:
+        op.drop_index("ix_attendance_open", table_name="attendance")
+    if "uq_attendance_open" not in existing:
+        op.create_index(
+            "uq_attendance_open", "attendance", ["member_id"], unique=True,
+            postgresql_where=sa.text(WHERE), sqlite_where=sa.text(WHERE),
+        )
+
+
+def downgrade():
+    existing = _existing()
+    if "uq_attendance_open" in existing:
+        op.drop_index("uq_attendance_open", table_name="attendance")
+    if "ix_attendance_open" not in existing:
+        op.create_index(
+            "ix_attendance_open", "attendance", ["member_id"],
+            postgresql_where=sa.text(WHERE), sqlite_where=sa.text(WHERE),
+        )
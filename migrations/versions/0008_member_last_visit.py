@@ -0,0 +1,36 @@
+"""member.last_visit_date (O(1) streak updates)
+
+Revision ID: 0008_member_last_visit
+Revises: 0007_attendance_open_unique
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_member_last_visit'
+down_revision = '0007_attendance_open_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("member")}
+    if "last_visit_date" not in existing:
+        op.add_column("member", sa.Column("last_visit_date", sa.Date(), nullable=True))
+
+    # Anchor existing streaks on the last completed visit; `flask recompute-streaks`
+    # rebuilds the streak values themselves.
+    op.execute("""
+        UPDATE member SET last_visit_date = (
+            SELECT MAX(date(a.check_in_time)) FROM attendance a
+            WHERE a.member_id = member.user_id AND a.check_out_time IS NOT NULL
+        )
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table("member") as batch_op:
+        batch_op.drop_column("last_visit_date")
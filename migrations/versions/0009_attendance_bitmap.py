@@ -0,0 +1,55 @@
+"""attendance_bitmap presence bitmaps
+
+Revision ID: 0009_attendance_bitmap
+Revises: 0008_member_last_visit
+Create Date: 2026-10-18 13:30:00
+
+"""
+from collections import defaultdict
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_attendance_bitmap'
+down_revision = '0008_member_last_visit'
+branch_labels = None
+depends_on = None
+
+YEAR_BYTES = 46
+
+
+def upgrade():
+    bind = op.get_bind()
+    if "attendance_bitmap" in sa.inspect(bind).get_table_names():
+        return
+    bitmap = op.create_table(
+        "attendance_bitmap",
+        sa.Column("member_id", sa.Integer(), nullable=False),
+        sa.Column("year", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("bits", sa.LargeBinary(length=YEAR_BYTES), nullable=False),
+        sa.ForeignKeyConstraint(["member_id"], ["member.user_id"]),
+        sa.PrimaryKeyConstraint("member_id", "year"),
+    )
+
+    # Backfill from history (same layout as services/attendance_bitmap.py).
+    bitmaps = defaultdict(lambda: bytearray(YEAR_BYTES))
+    rows = bind.execute(sa.text(
+        "SELECT DISTINCT member_id, date(check_in_time) FROM attendance "
+        "WHERE check_in_time IS NOT NULL"
+    ))
+    for member_id, day in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        n = day.timetuple().tm_yday - 1
+        bitmaps[(member_id, day.year)][n // 8] |= 1 << (n % 8)
+    if bitmaps:
+        op.bulk_insert(bitmap, [
+            {"member_id": m, "year": y, "bits": bytes(b)} for (m, y), b in bitmaps.items()
+        ])
+
+
+def downgrade():
+    op.drop_table("attendance_bitmap")
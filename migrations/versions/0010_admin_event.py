@@ -0,0 +1,35 @@
+"""admin_event feed
+
+Revision ID: 0010_admin_event
+Revises: 0009_attendance_bitmap
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_admin_event'
+down_revision = '0009_attendance_bitmap'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "admin_event" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "admin_event",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=40), nullable=False),
+        sa.Column("subscription_id", sa.Integer(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_admin_event_created_at", "admin_event", ["created_at"])
+
+
+def downgrade():
+    op.drop_table("admin_event")
@@ -0,0 +1,44 @@
+"""attendance.auto_closed + job_run audit table
+
+Revision ID: 0011_attendance_sweeper
+Revises: 0010_admin_event
+Create Date: 2026-10-18 14:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011_attendance_sweeper'
+down_revision = '0010_admin_event'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    if "auto_closed" not in {c["name"] for c in insp.get_columns("attendance")}:
+        op.add_column(
+            "attendance",
+            sa.Column("auto_closed", sa.Boolean(), nullable=False, server_default=sa.false()),
+        )
+    if "job_run" not in insp.get_table_names():
+        op.create_table(
+            "job_run",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("job", sa.String(length=64), nullable=False),
+            sa.Column("triggered_by", sa.String(length=64), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.Column("rows_affected", sa.Integer(), nullable=False),
+            sa.Column("details", sa.JSON(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_job_run_job", "job_run", ["job"])
+
+
+def downgrade():
+    op.drop_table("job_run")
+    with op.batch_alter_table("attendance") as batch_op:
+        batch_op.drop_column("auto_closed")
@@ -1,5 +1,5 @@
 import uuid
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
 from extensions import db
 from flask_security import UserMixin, RoleMixin
@@ -9,6 +9,18 @@ IST = ZoneInfo("Asia/Kolkata")
 def now_ist():
     return datetime.now(IST)
 
+# Subscriptions that were approved at some point ("expired" ones lapsed past end_date).
+APPROVED_STATUSES = ("active", "expired")
+
+# ── App metadata ───────────────────────────────────────────────────────────────
+
+class AppMeta(db.Model):
+    """Key/value stamps written by maintenance commands (e.g. bootstrap version)."""
+    __tablename__ = "app_meta"
+    key   = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.String(255), nullable=False)
+
+
 # ── Auth Models ───────────────────────────────────────────────────────────────
 
 roles_users = db.Table(
@@ -51,31 +63,135 @@ class Admin(db.Model):
 class Member(db.Model):
     user_id         = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
     name            = db.Column(db.String(255), nullable=False)
-    join_date       = db.Column(db.DateTime, default=now_ist)
+    join_date       = db.Column(db.DateTime, default=now_ist, index=True)
     streak          = db.Column(db.Integer, default=0)
+    last_visit_date = db.Column(db.Date, nullable=True)   # day of the last completed visit (streak anchor)
     height_cm       = db.Column(db.Float, nullable=True)
     weight_kg       = db.Column(db.Float, nullable=True)
     profession      = db.Column(db.String(255), nullable=True)
     dob             = db.Column(db.Date, nullable=True)
 
+    # Membership snapshot — maintained on write by the payment/subscription
+    # routes, rebuilt with `flask rebuild-membership`.
+    current_subscription_id = db.Column(
+        db.Integer,
+        db.ForeignKey("subscription.id", use_alter=True, name="fk_member_current_subscription"),
+        nullable=True,
+    )
+    current_end_date = db.Column(db.Date, nullable=True, index=True)
+    has_pending      = db.Column(db.Boolean, default=False, nullable=False)
+
     user            = db.relationship("User", backref="member_profile")
     subscriptions   = db.relationship("Subscription", backref="member", lazy="dynamic", foreign_keys="Subscription.member_id")
     transactions    = db.relationship("Transaction", backref="member", lazy="dynamic", foreign_keys="Transaction.member_id")
     attendances     = db.relationship("Attendance", backref="member", lazy="dynamic")
+    current_subscription = db.relationship(
+        "Subscription", foreign_keys=[current_subscription_id], post_update=True
+    )
+
+    @property
+    def is_active_member(self):
+        """True if the membership snapshot covers today."""
+        return self.current_end_date is not None and self.current_end_date >= date.today()
 
     @property
     def active_subscription(self):
         """Return the current active (approved + not expired) subscription."""
-        from sqlalchemy import and_
-        return (
-            Subscription.query
-            .filter(
-                Subscription.member_id == self.user_id,
-                Subscription.status == "active",
-                Subscription.end_date >= date.today(),
+        return self.current_subscription if self.is_active_member else None
+
+    def mark_approved(self, sub):
+        """Update the snapshot after `sub` was approved (same transaction)."""
+        if self.current_end_date is None or sub.end_date >= self.current_end_date:
+            self.current_subscription = sub
+            self.current_end_date     = sub.end_date
+        self.has_pending = False
+
+    @classmethod
+    def resolve_subscriptions(cls, member_ids, with_pending=True):
+        """
+        Bulk version of active_subscription / pending_subscription.
+        Returns (active, pending) dicts keyed by member_id. Active comes from
+        the membership snapshot (a primary-key join), pending only for members
+        whose has_pending flag is set; one query each, whatever the page size.
+        """
+        member_ids = list(member_ids)
+        if not member_ids:
+            return {}, {}
+
+        active = {
+            member_id: sub
+            for member_id, sub in db.session.execute(
+                db.select(cls.user_id, Subscription)
+                .join(Subscription, Subscription.id == cls.current_subscription_id)
+                .where(cls.user_id.in_(member_ids), cls.current_end_date >= date.today())
+            )
+        }
+
+        pending = {}
+        if with_pending:
+            for s in db.session.execute(
+                db.select(Subscription)
+                .join(cls, cls.user_id == Subscription.member_id)
+                .where(
+                    cls.user_id.in_(member_ids),
+                    cls.has_pending.is_(True),
+                    Subscription.status == "pending",
+                )
+                .order_by(Subscription.member_id, Subscription.created_at.desc())
+            ).scalars():
+                pending.setdefault(s.member_id, s)
+
+        return active, pending
+
+    @classmethod
+    def rebuild_membership_snapshots(cls):
+        """Recompute every member's snapshot from the subscription table."""
+        latest = (
+            db.select(Subscription.id)
+            .where(Subscription.member_id == cls.user_id, Subscription.status.in_(APPROVED_STATUSES))
+            .order_by(Subscription.end_date.desc(), Subscription.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        end_date = (
+            db.select(db.func.max(Subscription.end_date))
+            .where(Subscription.member_id == cls.user_id, Subscription.status.in_(APPROVED_STATUSES))
+            .scalar_subquery()
+        )
+        pending = (
+            db.select(Subscription.id)
+            .where(Subscription.member_id == cls.user_id, Subscription.status == "pending")
+            .exists()
+        )
+        result = db.session.execute(
+            db.update(cls).values(
+                current_subscription_id=latest,
+                current_end_date=end_date,
+                has_pending=pending,
+            )
+        )
+        return result.rowcount
+
+    @classmethod
+    def record_visit(cls, member_id, day):
+        """
+        Advance the streak for a completed visit on `day` with one UPDATE:
+        +1 after yesterday's visit, unchanged for another visit the same day,
+        otherwise restart at 1.
+        """
+        return db.session.execute(
+            db.update(cls)
+            .where(cls.user_id == member_id)
+            .values(
+                streak=db.case(
+                    (cls.last_visit_date >= day, db.func.coalesce(cls.streak, 1)),
+                    (cls.last_visit_date == day - timedelta(days=1), db.func.coalesce(cls.streak, 0) + 1),
+                    else_=1,
+                ),
+                last_visit_date=db.case(
+                    (cls.last_visit_date >= day, cls.last_visit_date), else_=day
+                ),
             )
-            .order_by(Subscription.end_date.desc())
-            .first()
         )
 
     @property
@@ -124,6 +240,16 @@ class Subscription(db.Model):
     status: pending → active → expired
             pending → rejected
     """
+    __table_args__ = (
+        db.Index("ix_subscription_member_status_end", "member_id", "status", "end_date"),
+        db.Index("ix_subscription_status_created", "status", "created_at"),
+        db.Index(
+            "ix_subscription_active_end", "end_date",
+            postgresql_where=db.text("status = 'active'"),
+            sqlite_where=db.text("status = 'active'"),
+        ),
+    )
+
     id           = db.Column(db.Integer, primary_key=True)
     member_id    = db.Column(db.Integer, db.ForeignKey("member.user_id"), nullable=False)
     plan_id      = db.Column(db.Integer, db.ForeignKey("plan.id"), nullable=False)
@@ -145,6 +271,21 @@ class Subscription(db.Model):
     plan         = db.relationship("Plan")
     approver     = db.relationship("User", foreign_keys=[approved_by])
 
+    @classmethod
+    def claim_pending(cls, sub_id, new_status):
+        """
+        Move a pending subscription to `new_status` with one conditional
+        UPDATE. The row lock makes concurrent approve/reject/cancel calls
+        serialise, and only the first one gets True; the others see the
+        row no longer pending and must not touch revenue or the snapshot.
+        """
+        return db.session.execute(
+            db.update(cls)
+            .where(cls.id == sub_id, cls.status == "pending")
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -165,6 +306,11 @@ class Subscription(db.Model):
 
 class Transaction(db.Model):
     """Financial transaction record — always created alongside a Subscription."""
+    __table_args__ = (
+        db.Index("ix_transaction_status_date", "status", "transaction_date"),
+        db.Index("ix_transaction_member_date", "member_id", "transaction_date"),
+    )
+
     id               = db.Column(db.Integer, primary_key=True)
     member_id        = db.Column(db.Integer, db.ForeignKey("member.user_id"), nullable=False)
     subscription_id  = db.Column(db.Integer, db.ForeignKey("subscription.id"), nullable=True)
@@ -175,7 +321,7 @@ class Transaction(db.Model):
     description      = db.Column(db.String(255), nullable=True)
     recorded_by      = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
 
-    subscription     = db.relationship("Subscription", backref="transaction")
+    subscription     = db.relationship("Subscription", backref=db.backref("transaction", uselist=False))
     recorder         = db.relationship("User", foreign_keys=[recorded_by])
 
     def to_dict(self):
@@ -191,11 +337,46 @@ class Transaction(db.Model):
         }
 
 
+class RevenueDaily(db.Model):
+    """
+    Completed revenue rolled up per IST day, payment mode and plan.
+    Maintained by services/revenue.py as transactions change status;
+    plan_id is 0 for transactions without a subscription.
+    """
+    __tablename__ = "revenue_daily"
+    day       = db.Column(db.Date, primary_key=True)
+    mode      = db.Column(db.String(50), primary_key=True)
+    plan_id   = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    amount    = db.Column(db.Float, nullable=False, default=0)
+    txn_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "day": self.day.isoformat(),
+            "mode": self.mode,
+            "plan_id": self.plan_id,
+            "amount": round(self.amount, 2),
+            "txn_count": self.txn_count,
+        }
+
+
 class Attendance(db.Model):
+    __table_args__ = (
+        db.Index("ix_attendance_member_checkin", "member_id", "check_in_time"),
+        # At most one open visit per member; check-in relies on this to be race-free.
+        db.Index(
+            "uq_attendance_open", "member_id", unique=True,
+            postgresql_where=db.text("check_out_time IS NULL"),
+            sqlite_where=db.text("check_out_time IS NULL"),
+        ),
+    )
+
     id             = db.Column(db.Integer, primary_key=True)
     member_id      = db.Column(db.Integer, db.ForeignKey("member.user_id"), nullable=False)
     check_in_time  = db.Column(db.DateTime, default=now_ist)
     check_out_time = db.Column(db.DateTime, nullable=True)
+    # Closed by the stale-visit sweeper, not by the member (check_out_time = check_in_time)
+    auto_closed    = db.Column(db.Boolean, nullable=False, default=False)
 
     def to_dict(self):
         return {
@@ -203,4 +384,53 @@ class Attendance(db.Model):
             "member_id": self.member_id,
             "check_in_time": self.check_in_time.isoformat() if self.check_in_time else None,
             "check_out_time": self.check_out_time.isoformat() if self.check_out_time else None,
-        }
\ No newline at end of file
+            "auto_closed": bool(self.auto_closed),
+        }
+
+class AttendanceBitmap(db.Model):
+    """
+    One bit per IST day a member checked in, one row per member and year.
+    Bit n (byte n // 8, bit n % 8) is day-of-year n + 1. Maintained on
+    check-in by services/attendance_bitmap.py.
+    """
+    __tablename__ = "attendance_bitmap"
+    member_id = db.Column(db.Integer, db.ForeignKey("member.user_id"), primary_key=True)
+    year      = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    bits      = db.Column(db.LargeBinary(46), nullable=False)
+
+
+class AdminEvent(db.Model):
+    """
+    Append-only feed of subscription/payment changes, written in the same
+    transaction as the change and streamed to admin dashboards
+    (services/admin_events.py).
+    """
+    __tablename__ = "admin_event"
+    id              = db.Column(db.Integer, primary_key=True)
+    kind            = db.Column(db.String(40), nullable=False)
+    subscription_id = db.Column(db.Integer, nullable=True)
+    data            = db.Column(db.JSON, nullable=False)
+    created_at      = db.Column(db.DateTime, default=now_ist, index=True)
+
+
+class JobRun(db.Model):
+    """Audit trail of maintenance jobs (attendance sweeper, expiry, ...)."""
+    __tablename__ = "job_run"
+    id            = db.Column(db.Integer, primary_key=True)
+    job           = db.Column(db.String(64), nullable=False, index=True)
+    triggered_by  = db.Column(db.String(64), nullable=False)   # "cli", "scheduler", "admin:<user id>"
+    started_at    = db.Column(db.DateTime, default=now_ist)
+    finished_at   = db.Column(db.DateTime, nullable=True)
+    rows_affected = db.Column(db.Integer, nullable=False, default=0)
+    details       = db.Column(db.JSON, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "job": self.job,
+            "triggered_by": self.triggered_by,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "rows_affected": self.rows_affected,
+            "details": self.details,
+        }
@@ -1,51 +1,84 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_security import login_required, current_user, hash_password
 from extensions import db
-from models import User, Role, Member, Plan, Subscription, Transaction, Attendance
+from models import User, Role, Member, Plan, Subscription, now_ist
+from services import attendance, jobs, member_import, occupancy, pagination, revenue, stats
+from services import search as member_search
+import datastore as identity_cache
 from .auth_utils import admin_required
 import uuid
+from datetime import datetime
 
 admin_bp = Blueprint("admin", __name__)
 
 
 # ── Members ───────────────────────────────────────────────────────────────────
 
+def _member_rows(members):
+    active, _ = Member.resolve_subscriptions((m.user_id for m in members), with_pending=False)
+    return [_member_row(m, active.get(m.user_id)) for m in members]
+
+
+def _member_row(m, sub):
+    return {
+        "user_id":      m.user_id,
+        "name":         m.name,
+        "username":     m.user.username,
+        "phone":        m.user.phone,
+        "email":        m.user.email,
+        "join_date":    m.join_date.isoformat() if m.join_date else None,
+        "streak":       m.streak,
+        "active_subscription": sub.to_dict() if sub else None,
+        "has_pending":  m.has_pending,
+    }
+
+
 @admin_bp.route("/members", methods=["GET"])
 @login_required
 @admin_required
 def list_members():
+    """
+    Paged member list. ?page= gives numbered pages; passing ?after= (empty
+    for the first page, then the returned next_cursor) switches to keyset
+    pagination ordered by (join_date, user_id) with a cached total.
+    ?q= searches name, username and phone through services/search.py;
+    numbered pages are then ordered by match rank.
+    """
     search = request.args.get("q", "").strip()
     page   = int(request.args.get("page", 1))
     per    = int(request.args.get("per_page", 20))
 
-    q = Member.query.join(User, Member.user_id == User.id)
+    q = (
+        Member.query
+        .join(User, Member.user_id == User.id)
+        .options(db.contains_eager(Member.user))
+    )
+    rank = None
     if search:
-        q = q.filter(
-            db.or_(
-                User.username.ilike(f"%{search}%"),
-                Member.name.ilike(f"%{search}%"),
-                User.phone.ilike(f"%{search}%"),
-            )
-        )
-    paginated = q.order_by(Member.join_date.desc()).paginate(page=page, per_page=per, error_out=False)
-
-    members = []
-    for m in paginated.items:
-        sub = m.active_subscription
-        members.append({
-            "user_id":      m.user_id,
-            "name":         m.name,
-            "username":     m.user.username,
-            "phone":        m.user.phone,
-            "email":        m.user.email,
-            "join_date":    m.join_date.isoformat() if m.join_date else None,
-            "streak":       m.streak,
-            "active_subscription": sub.to_dict() if sub else None,
-            "has_pending":  m.pending_subscription is not None,
+        q, rank = member_search.filter_members(q, search)
+
+    if "after" in request.args:
+        per   = max(1, min(per, 100))
+        total = pagination.cached_count(("members", search), q)
+        after = request.args.get("after")
+        if after:
+            try:
+                values = pagination.decode_cursor(after, datetime, int)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            q = pagination.keyset_after(q, (Member.join_date, Member.user_id), values)
+        rows = q.order_by(*pagination.keyset_order((Member.join_date, Member.user_id))).limit(per + 1).all()
+        more, rows = len(rows) > per, rows[:per]
+        return jsonify({
+            "members":     _member_rows(rows),
+            "total":       total,
+            "next_cursor": pagination.encode_cursor(rows[-1].join_date, rows[-1].user_id) if more else None,
         })
 
+    order = [Member.join_date.desc()] if rank is None else [rank, Member.join_date.desc()]
+    paginated = q.order_by(*order).paginate(page=page, per_page=per, error_out=False)
     return jsonify({
-        "members": members,
+        "members": _member_rows(paginated.items),
         "total":   paginated.total,
         "pages":   paginated.pages,
         "page":    page,
@@ -97,6 +130,7 @@ def update_member(member_id):
         m.user.email = data["email"] or None
     if "active" in data:
         m.user.active = bool(data["active"])
+    identity_cache.invalidate(m.user)
     db.session.commit()
     return jsonify({"message": "Member updated"})
 
@@ -142,6 +176,103 @@ def create_member():
     return jsonify({"message": "Member created", "user_id": user.id}), 201
 
 
+@admin_bp.route("/members/import", methods=["POST"])
+@login_required
+@admin_required
+def import_members():
+    """
+    Bulk-create members from a JSON list (or {"members": [...]}) or a CSV
+    upload (file field "file", or a text/csv body). Returns a per-row report.
+    """
+    default_password = request.args.get("default_password") or member_import.DEFAULT_PASSWORD
+    if "file" in request.files:
+        rows = member_import.parse_csv(request.files["file"].read().decode("utf-8-sig"))
+    elif request.mimetype == "text/csv":
+        rows = member_import.parse_csv(request.get_data(as_text=True))
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            default_password = data.get("default_password") or default_password
+            data = data.get("members")
+        rows = data if isinstance(data, list) else []
+
+    if not rows:
+        return jsonify({"error": "No rows to import"}), 400
+    if len(rows) > member_import.MAX_ROWS:
+        return jsonify({"error": f"At most {member_import.MAX_ROWS} rows per import"}), 400
+    if not all(isinstance(r, dict) for r in rows):
+        return jsonify({"error": "Each row must be an object"}), 400
+
+    report = member_import.import_members(rows, default_password)
+    stats.invalidate()
+    return jsonify(report), 201 if report["created"] else 200
+
+
+# ── Front-desk attendance ─────────────────────────────────────────────────────
+
+BATCH_CHECKIN_LIMIT = 200
+
+
+@admin_bp.route("/attendance/checkin", methods=["POST"])
+@login_required
+@admin_required
+def batch_check_in():
+    """Check in a queue of scanned members: {"member_ids": [..]} → result per member."""
+    data = request.get_json(silent=True) or {}
+    ids  = data.get("member_ids")
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "member_ids must be a non-empty list"}), 400
+    if len(ids) > BATCH_CHECKIN_LIMIT:
+        return jsonify({"error": f"At most {BATCH_CHECKIN_LIMIT} members per batch"}), 400
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        return jsonify({"error": "member_ids must be integers"}), 400
+
+    results = attendance.check_in_many(ids)
+    db.session.commit()
+    checked_in = sum(r["status"] == "checked_in" for r in results)
+    occupancy.adjust(checked_in)
+    return jsonify({"checked_in": checked_in, "results": results})
+
+
+@admin_bp.route("/attendance/sweep", methods=["POST"])
+@login_required
+@admin_required
+def sweep_attendance():
+    """
+    Close stale open visits: {"max_hours": n} (default ATTENDANCE_MAX_VISIT_HOURS)
+    or {"midnight": true} for everything opened before today (IST).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        hours = float(data.get("max_hours") or current_app.config["ATTENDANCE_MAX_VISIT_HOURS"])
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_hours must be a number"}), 400
+    if hours <= 0:
+        return jsonify({"error": "max_hours must be positive"}), 400
+
+    cutoff = attendance.stale_cutoff(hours, midnight=bool(data.get("midnight")))
+    run = jobs.run("attendance_sweep", f"admin:{current_user.id}", attendance.sweep_stale, cutoff)
+    occupancy.adjust(-run["rows_affected"])
+    return jsonify({"closed": run["rows_affected"], "job_run": run})
+
+
+@admin_bp.route("/job-runs", methods=["GET"])
+@login_required
+@admin_required
+def list_job_runs():
+    """Most recent maintenance job runs (?job= to filter)."""
+    return jsonify([r.to_dict() for r in jobs.recent(request.args.get("job"))])
+
+
+@admin_bp.route("/occupancy", methods=["GET"])
+@login_required
+@admin_required
+def get_occupancy():
+    return jsonify(occupancy.snapshot())
+
+
 # ── Plans ──────────────────────────────────────────────────────────────────────
 
 @admin_bp.route("/plans", methods=["GET"])
@@ -211,53 +342,21 @@ def delete_plan(plan_id):
 @login_required
 @admin_required
 def dashboard_stats():
-    from sqlalchemy import func
-    from datetime import date, datetime
+    return jsonify(stats.get_dashboard_stats())
 
-    today = date.today()
-    month_start = today.replace(day=1)
 
-    total_members = Member.query.count()
-    active_subs   = (
-        Subscription.query
-        .filter_by(status="active")
-        .filter(Subscription.end_date >= today)
-        .count()
-    )
-    pending_approvals = Subscription.query.filter_by(status="pending").count()
-    total_revenue = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter_by(status="completed")
-        .scalar() or 0
-    )
-    month_revenue = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.status == "completed",
-            Transaction.transaction_date >= datetime.combine(month_start, datetime.min.time()),
-        )
-        .scalar() or 0
-    )
-    # Expiring within 7 days
-    from datetime import timedelta
-    expiring_soon = (
-        Subscription.query
-        .filter_by(status="active")
-        .filter(
-            Subscription.end_date >= today,
-            Subscription.end_date <= today + timedelta(days=7),
-        )
-        .count()
-    )
-
-    return jsonify({
-        "total_members":      total_members,
-        "active_subscriptions": active_subs,
-        "pending_approvals":  pending_approvals,
-        "total_revenue":      round(float(total_revenue), 2),
-        "month_revenue":      round(float(month_revenue), 2),
-        "expiring_soon":      expiring_soon,
-    })
+@admin_bp.route("/revenue/daily", methods=["GET"])
+@login_required
+@admin_required
+def revenue_daily():
+    """Daily revenue rollup rows for charts (?from=&to= as YYYY-MM-DD, default last 30 days)."""
+    from datetime import date, timedelta
+    try:
+        end   = date.fromisoformat(request.args["to"]) if request.args.get("to") else now_ist().date()
+        start = date.fromisoformat(request.args["from"]) if request.args.get("from") else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({"error": "from/to must be YYYY-MM-DD"}), 400
+    return jsonify([r.to_dict() for r in revenue.series(start, end)])
 
 # ── Member password reset (admin only) ────────────────────────────────────────
 
@@ -284,5 +383,6 @@ def reset_member_password(member_id):
         return jsonify({"error": "Password must be 72 characters or fewer"}), 400
 
     m.user.password = hash_password(new_password)
+    identity_cache.invalidate(m.user)
     db.session.commit()
     return jsonify({"message": f"Password reset for {m.name}"})
\ No newline at end of file
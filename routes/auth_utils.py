@@ -1,15 +1,34 @@
 from functools import wraps
-from flask import jsonify
+from flask import g, jsonify
 from flask_security import current_user
 
+ADMIN_ROLES = frozenset({"admin", "super_admin"})
+
+
+def current_roles():
+    """
+    Role names of the logged-in user, built once per request.
+    The roles are joined into the user-loader query (SECURITY_JOIN_USER_ROLES),
+    so this never issues a query of its own.
+    """
+    if "role_names" not in g:
+        g.role_names = (
+            frozenset(r.name for r in current_user.roles)
+            if current_user.is_authenticated else frozenset()
+        )
+    return g.role_names
+
+
+def is_admin():
+    return bool(current_roles() & ADMIN_ROLES)
+
 
 def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         if not current_user.is_authenticated:
             return jsonify({"error": "Authentication required"}), 401
-        roles = {r.name for r in current_user.roles}
-        if not (roles & {"admin", "super_admin"}):
+        if not is_admin():
             return jsonify({"error": "Admin access required"}), 403
         return f(*args, **kwargs)
     return decorated
@@ -20,8 +39,7 @@ def member_required(f):
     def decorated(*args, **kwargs):
         if not current_user.is_authenticated:
             return jsonify({"error": "Authentication required"}), 401
-        roles = {r.name for r in current_user.roles}
-        if "member" not in roles and not (roles & {"admin", "super_admin"}):
+        if "member" not in current_roles() and not is_admin():
             return jsonify({"error": "Member access required"}), 403
         return f(*args, **kwargs)
-    return decorated
\ No newline at end of file
+    return decorated
@@ -1,9 +1,11 @@
 import uuid
-from datetime import date
+from datetime import date, timedelta
 from flask import Blueprint, request, jsonify
 from flask_security import login_required, current_user, hash_password
 from extensions import db
-from models import User, Role, Member, Subscription, Transaction, Attendance, Plan
+from models import User, Role, Member, Subscription, Transaction, Attendance, Plan, now_ist
+from services import admin_events, attendance, attendance_bitmap, occupancy, revenue, stats
+import datastore as identity_cache
 
 member_bp = Blueprint("member", __name__)
 
@@ -111,6 +113,7 @@ def update_profile():
     if "email" in data:
         current_user.email = data["email"] or None
 
+    identity_cache.invalidate(current_user)
     db.session.commit()
     return jsonify({"message": "Profile updated"})
 
@@ -166,6 +169,7 @@ def request_subscription():
         notes=data.get("notes"),
     )
     db.session.add(sub)
+    m.has_pending = True
     db.session.flush()
 
     txn = Transaction(
@@ -177,7 +181,13 @@ def request_subscription():
         description=f"Payment for {plan.name} plan",
     )
     db.session.add(txn)
+    db.session.flush()
+    admin_events.record(
+        "subscription_requested", sub,
+        **sub.to_dict(), member_name=m.name, member_username=current_user.username,
+    )
     db.session.commit()
+    stats.invalidate()
 
     return jsonify({
         "message": "Payment request submitted. Waiting for admin approval.",
@@ -195,10 +205,15 @@ def cancel_pending():
     pending = m.pending_subscription
     if not pending:
         return jsonify({"error": "No pending subscription found"}), 404
-    pending.status = "rejected"
+    if not Subscription.claim_pending(pending.id, "rejected"):
+        return jsonify({"error": "Request was already processed by an admin"}), 409
+    db.session.refresh(pending)
     if pending.transaction:
-        pending.transaction.status = "refunded"
+        revenue.transition(pending.transaction, "refunded")
+    m.has_pending = False
+    admin_events.record("subscription_cancelled", pending, status=pending.status)
     db.session.commit()
+    stats.invalidate()
     return jsonify({"message": "Pending request cancelled"})
 
 
@@ -207,52 +222,26 @@ def cancel_pending():
 @member_bp.route("/attendance/checkin", methods=["POST"])
 @login_required
 def check_in():
-    from models import now_ist
-    existing = (
-        Attendance.query
-        .filter_by(member_id=current_user.id, check_out_time=None)
-        .first()
-    )
-    if existing:
+    att = attendance.check_in(current_user.id)
+    if att is None:
         return jsonify({"error": "Already checked in"}), 409
-    att = Attendance(member_id=current_user.id)
-    db.session.add(att)
+    payload = att.to_dict()   # before commit expires the RETURNING values
     db.session.commit()
-    return jsonify({"message": "Checked in", "attendance": att.to_dict()}), 201
+    occupancy.adjust(+1)
+    return jsonify({"message": "Checked in", "attendance": payload}), 201
 
 
 @member_bp.route("/attendance/checkout", methods=["POST"])
 @login_required
 def check_out():
-    from models import now_ist
-    att = (
-        Attendance.query
-        .filter_by(member_id=current_user.id, check_out_time=None)
-        .first()
-    )
-    if not att:
+    att = attendance.check_out(current_user.id)
+    if att is None:
         return jsonify({"error": "No active check-in found"}), 404
-    att.check_out_time = now_ist()
-    # Update streak
-    m = Member.query.get(current_user.id)
-    if m:
-        last = (
-            Attendance.query
-            .filter(
-                Attendance.member_id == current_user.id,
-                Attendance.check_out_time.isnot(None),
-                Attendance.id != att.id,
-            )
-            .order_by(Attendance.check_in_time.desc())
-            .first()
-        )
-        if last and last.check_in_time:
-            delta = (att.check_in_time.date() - last.check_in_time.date()).days
-            m.streak = m.streak + 1 if delta == 1 else 1
-        else:
-            m.streak = 1
+    Member.record_visit(current_user.id, att.check_in_time.date())
+    payload = att.to_dict()
     db.session.commit()
-    return jsonify({"message": "Checked out", "attendance": att.to_dict()})
+    occupancy.adjust(-1)
+    return jsonify({"message": "Checked out", "attendance": payload})
 
 
 @member_bp.route("/attendance/history", methods=["GET"])
@@ -268,6 +257,34 @@ def attendance_history():
     return jsonify([r.to_dict() for r in records])
 
 
+@member_bp.route("/attendance/calendar", methods=["GET"])
+@login_required
+def attendance_calendar():
+    """Days visited in ?year= (default: this year, IST) for a calendar/heatmap."""
+    year = request.args.get("year", now_ist().year, type=int)
+    if not 2000 <= year <= 2100:
+        return jsonify({"error": "Invalid year"}), 400
+    first = date(year, 1, 1)
+    days = [(first + timedelta(days=i)).isoformat() for i in attendance_bitmap.year_days(current_user.id, year)]
+    return jsonify({"year": year, "days": days, "visits": len(days)})
+
+
+@member_bp.route("/attendance/visits", methods=["GET"])
+@login_required
+def attendance_visits():
+    """Number of days visited between ?from= and ?to= (default: this month so far)."""
+    today = now_ist().date()
+    start = _parse_date(request.args.get("from")) or today.replace(day=1)
+    end   = _parse_date(request.args.get("to")) or today
+    if start > end:
+        return jsonify({"error": "from must not be after to"}), 400
+    return jsonify({
+        "from":   start.isoformat(),
+        "to":     end.isoformat(),
+        "visits": attendance_bitmap.count_visits(current_user.id, start, end),
+    })
+
+
 # ── Plans (public listing) ────────────────────────────────────────────────────
 
 @member_bp.route("/plans", methods=["GET"])
@@ -309,5 +326,6 @@ def update_password():
         return jsonify({"error": "Current password is incorrect"}), 401
 
     current_user.password = hash_password(new_password)
+    identity_cache.invalidate(current_user)
     db.session.commit()
     return jsonify({"message": "Password updated successfully"})
\ No newline at end of file
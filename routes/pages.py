@@ -1,17 +1,15 @@
 from flask import Blueprint, render_template, redirect, url_for
-from flask_security import login_required, current_user
-
-pages_bp = Blueprint("pages", __name__)
+from flask_security import login_required
 
+from .auth_utils import is_admin
 
-def _role(name):
-    return any(r.name == name for r in current_user.roles)
+pages_bp = Blueprint("pages", __name__)
 
 
 @pages_bp.route("/")
 @login_required
 def index():
-    if _role("admin") or _role("super_admin"):
+    if is_admin():
         return redirect(url_for("pages.admin_dashboard"))
     return redirect(url_for("pages.member_dashboard"))
 
@@ -19,7 +17,7 @@ def index():
 @pages_bp.route("/dashboard")
 @login_required
 def member_dashboard():
-    if _role("admin") or _role("super_admin"):
+    if is_admin():
         return redirect(url_for("pages.admin_dashboard"))
     return render_template("member/dashboard.html")
 
@@ -27,7 +25,7 @@ def member_dashboard():
 @pages_bp.route("/admin")
 @login_required
 def admin_dashboard():
-    if not (_role("admin") or _role("super_admin")):
+    if not is_admin():
         return redirect(url_for("pages.member_dashboard"))
     return render_template("admin/dashboard.html")
 
@@ -35,7 +33,7 @@ def admin_dashboard():
 @pages_bp.route("/admin/members")
 @login_required
 def admin_members():
-    if not (_role("admin") or _role("super_admin")):
+    if not is_admin():
         return redirect(url_for("pages.member_dashboard"))
     return render_template("admin/members.html")
 
@@ -43,7 +41,7 @@ def admin_members():
 @pages_bp.route("/admin/payments")
 @login_required
 def admin_payments():
-    if not (_role("admin") or _role("super_admin")):
+    if not is_admin():
         return redirect(url_for("pages.member_dashboard"))
     return render_template("admin/payments.html")
 
@@ -51,7 +49,7 @@ def admin_payments():
 @pages_bp.route("/admin/plans")
 @login_required
 def admin_plans():
-    if not (_role("admin") or _role("super_admin")):
+    if not is_admin():
         return redirect(url_for("pages.member_dashboard"))
     return render_template("admin/plans.html")
 
@@ -1,32 +1,74 @@
-from datetime import date, timedelta
-from flask import Blueprint, request, jsonify
+import json
+import time
+from datetime import date, datetime, timedelta
+from flask import Blueprint, Response, current_app, request, jsonify
 from flask_security import login_required, current_user
 from extensions import db
-from models import Subscription, Transaction, Member
+from models import User, Subscription, Transaction, Member
+from services import admin_events, occupancy, pagination, revenue, stats
 from .auth_utils import admin_required
 
 payment_bp = Blueprint("payment", __name__)
 
 
+# Upper bound for the legacy (unpaged) /pending response.
+PENDING_LIST_LIMIT = 500
+# How long a client turned away from the event feed waits before polling again.
+RETRY_MS = 5000
+
+
+def _with_member(q, member_id_col):
+    """Join member name + username onto q so rows need no per-row lookups."""
+    return (
+        q.outerjoin(Member, Member.user_id == member_id_col)
+        .outerjoin(User, User.id == Member.user_id)
+        .add_columns(Member.name, User.username)
+    )
+
+
+def _row_dict(obj, name, username):
+    d = obj.to_dict()
+    d["member_name"]     = name if name is not None else "Unknown"
+    d["member_username"] = username or ""
+    return d
+
+
 @payment_bp.route("/pending", methods=["GET"])
 @login_required
 @admin_required
 def list_pending():
-    """All subscriptions awaiting admin approval."""
-    subs = (
-        Subscription.query
-        .filter_by(status="pending")
-        .order_by(Subscription.created_at.asc())
-        .all()
+    """
+    Subscriptions awaiting admin approval, oldest first.
+    Pass ?page= (and optionally ?per_page=) for a paged response; without
+    it a plain list of at most PENDING_LIST_LIMIT rows is returned, with
+    X-Truncated: true (and a logged warning) when more are pending.
+    """
+    q = _with_member(
+        db.session.query(Subscription)
+        .filter(Subscription.status == "pending")
+        .order_by(Subscription.created_at.asc()),
+        Subscription.member_id,
     )
-    result = []
-    for s in subs:
-        d = s.to_dict()
-        m = Member.query.get(s.member_id)
-        d["member_name"] = m.name if m else "Unknown"
-        d["member_username"] = m.user.username if m else ""
-        result.append(d)
-    return jsonify(result)
+
+    if "page" in request.args:
+        page      = int(request.args.get("page", 1))
+        per       = min(int(request.args.get("per_page", 20)), 100)
+        paginated = q.paginate(page=page, per_page=per, error_out=False)
+        return jsonify({
+            "pending": [_row_dict(*row) for row in paginated.items],
+            "total":   paginated.total,
+            "pages":   paginated.pages,
+            "page":    page,
+        })
+
+    rows = q.limit(PENDING_LIST_LIMIT + 1).all()
+    response = jsonify([_row_dict(*row) for row in rows[:PENDING_LIST_LIMIT]])
+    if len(rows) > PENDING_LIST_LIMIT:
+        current_app.logger.warning(
+            f"/api/payment/pending truncated at {PENDING_LIST_LIMIT} rows; use ?page= for the rest"
+        )
+        response.headers["X-Truncated"] = "true"
+    return response
 
 
 @payment_bp.route("/approve/<int:sub_id>", methods=["POST"])
@@ -41,8 +83,9 @@ def approve_payment(sub_id):
       * Otherwise start from today
     - Marks transaction → completed
     """
+    claimed = Subscription.claim_pending(sub_id, "active")
     sub = Subscription.query.get_or_404(sub_id)
-    if sub.status != "pending":
+    if not claimed:
         return jsonify({"error": f"Subscription is already '{sub.status}'"}), 409
 
     data  = request.get_json(silent=True) or {}
@@ -50,16 +93,14 @@ def approve_payment(sub_id):
 
     # Determine start date
     m = Member.query.get(sub.member_id)
-    active_sub = m.active_subscription if m else None
-    if active_sub and active_sub.end_date and active_sub.end_date >= date.today():
-        start = active_sub.end_date + timedelta(days=1)   # stack on top of current
+    if m and m.is_active_member:
+        start = m.current_end_date + timedelta(days=1)   # stack on top of current
     else:
         start = date.today()
 
     end = start + timedelta(days=sub.duration_days - 1)
 
     from models import now_ist
-    sub.status      = "active"
     sub.start_date  = start
     sub.end_date    = end
     sub.approved_at = now_ist()
@@ -69,10 +110,15 @@ def approve_payment(sub_id):
 
     # Update linked transaction
     if sub.transaction:
-        sub.transaction.status      = "completed"
+        revenue.transition(sub.transaction, "completed")
         sub.transaction.recorded_by = current_user.id
 
+    if m:
+        m.mark_approved(sub)
+
+    admin_events.record("payment_approved", sub, status=sub.status, amount=sub.amount)
     db.session.commit()
+    stats.invalidate()
     return jsonify({
         "message": f"Subscription approved. Active {start} → {end}.",
         "subscription": sub.to_dict(),
@@ -84,19 +130,23 @@ def approve_payment(sub_id):
 @admin_required
 def reject_payment(sub_id):
     """Admin rejects a pending subscription."""
+    claimed = Subscription.claim_pending(sub_id, "rejected")
     sub = Subscription.query.get_or_404(sub_id)
-    if sub.status != "pending":
+    if not claimed:
         return jsonify({"error": f"Subscription is already '{sub.status}'"}), 409
 
     data  = request.get_json(silent=True) or {}
     notes = data.get("notes", "Payment rejected by admin")
 
-    sub.status = "rejected"
     sub.notes  = notes
     if sub.transaction:
-        sub.transaction.status = "refunded"
+        revenue.transition(sub.transaction, "refunded")
+    if sub.member:
+        sub.member.has_pending = False
 
+    admin_events.record("payment_rejected", sub, status=sub.status)
     db.session.commit()
+    stats.invalidate()
     return jsonify({"message": "Subscription rejected", "subscription": sub.to_dict()})
 
 
@@ -104,23 +154,42 @@ def reject_payment(sub_id):
 @login_required
 @admin_required
 def payment_history():
-    """All transactions for admin view with optional filters."""
+    """
+    All transactions for admin view with optional filters. Pass ?after=
+    (empty, then next_cursor) for keyset pagination by (transaction_date, id).
+    """
     status  = request.args.get("status")
     page    = int(request.args.get("page", 1))
     per     = int(request.args.get("per_page", 20))
 
-    q = Transaction.query.order_by(Transaction.transaction_date.desc())
+    q = db.session.query(Transaction)
     if status:
-        q = q.filter_by(status=status)
+        q = q.filter(Transaction.status == status)
 
+    if "after" in request.args:
+        per   = max(1, min(per, 100))
+        total = pagination.cached_count(("transactions", status), q)
+        after = request.args.get("after")
+        if after:
+            try:
+                values = pagination.decode_cursor(after, datetime, int)
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            q = pagination.keyset_after(q, (Transaction.transaction_date, Transaction.id), values)
+        order = pagination.keyset_order((Transaction.transaction_date, Transaction.id))
+        q = _with_member(q.order_by(*order), Transaction.member_id)
+        rows = q.limit(per + 1).all()
+        more, rows = len(rows) > per, rows[:per]
+        last = rows[-1][0] if rows else None
+        return jsonify({
+            "transactions": [_row_dict(*row) for row in rows],
+            "total":        total,
+            "next_cursor":  pagination.encode_cursor(last.transaction_date, last.id) if more else None,
+        })
+
+    q = _with_member(q.order_by(Transaction.transaction_date.desc()), Transaction.member_id)
     paginated = q.paginate(page=page, per_page=per, error_out=False)
-    result = []
-    for t in paginated.items:
-        d = t.to_dict()
-        m = Member.query.get(t.member_id)
-        d["member_name"]     = m.name if m else "Unknown"
-        d["member_username"] = m.user.username if m else ""
-        result.append(d)
+    result = [_row_dict(*row) for row in paginated.items]
 
     return jsonify({
         "transactions": result,
@@ -149,33 +218,105 @@ def member_payment_history(member_id):
 @admin_required
 def payment_stats():
     """Quick financial summary for admin dashboard."""
-    from sqlalchemy import func
-    from models import now_ist
-    from datetime import datetime
+    d = stats.get_dashboard_stats()
+    return jsonify({
+        "total_revenue":        d["total_revenue"],
+        "month_revenue":        d["month_revenue"],
+        "pending_approvals":    d["pending_approvals"],
+        "active_subscriptions": d["active_subscriptions"],
+    })
 
-    today     = date.today()
-    month_start = today.replace(day=1)
 
-    total_revenue = db.session.query(func.sum(Transaction.amount)).filter_by(status="completed").scalar() or 0
-    month_revenue = (
-        db.session.query(func.sum(Transaction.amount))
-        .filter(
-            Transaction.status == "completed",
-            Transaction.transaction_date >= datetime.combine(month_start, datetime.min.time()),
-        )
-        .scalar() or 0
-    )
-    pending_count  = Subscription.query.filter_by(status="pending").count()
-    active_count   = (
-        Subscription.query
-        .filter_by(status="active")
-        .filter(Subscription.end_date >= today)
-        .count()
-    )
+# ── Admin event feed ──────────────────────────────────────────────────────────
 
-    return jsonify({
-        "total_revenue":   round(total_revenue, 2),
-        "month_revenue":   round(month_revenue, 2),
-        "pending_approvals": pending_count,
-        "active_subscriptions": active_count,
-    })
\ No newline at end of file
+def _occupancy_changed(last):
+    return lambda: occupancy.current() != last
+
+
+@payment_bp.route("/events", methods=["GET"])
+@login_required
+@admin_required
+def events_poll():
+    """
+    Long-poll fallback for the event stream. ?after=<id> waits up to ?wait=
+    seconds (max 25) for newer events; without it, returns the current
+    last_id to start from. With ?occupancy=<last value seen> (empty at
+    first) the response also carries the occupancy count, and a change
+    to it ends the wait too. When this worker's waiter slots are full it
+    answers at once and sets retry_ms for the next request.
+    """
+    extra = {}
+    until = None
+    if "occupancy" in request.args:
+        seen  = request.args.get("occupancy", type=int)
+        until = _occupancy_changed(seen)
+        if seen is None:
+            extra = occupancy.snapshot()
+
+    if "after" not in request.args:
+        return jsonify({"events": [], "last_id": admin_events.last_id(), **extra})
+    after = request.args.get("after", 0, type=int)
+    wait  = min(max(request.args.get("wait", 25, type=int), 0), 25)
+    if not admin_events.acquire():
+        events = admin_events.since(after)
+        extra.update(retry_ms=RETRY_MS)
+    else:
+        try:
+            events = admin_events.wait(after, 0 if extra else wait, until)
+        finally:
+            admin_events.release()
+    if until:
+        extra.update(occupancy.snapshot())
+    return jsonify({"events": events, "last_id": events[-1]["id"] if events else after, **extra})
+
+
+@payment_bp.route("/events/stream", methods=["GET"])
+@login_required
+@admin_required
+def events_stream():
+    """
+    Server-sent events: one message per admin event (SSE id = event id, so
+    a reconnecting EventSource resumes via Last-Event-ID). With ?occupancy=1
+    occupancy changes are sent as `event: occupancy` messages as well.
+    Closes after ADMIN_EVENTS_STREAM_SECONDS; the browser reconnects on its
+    own. Answers 503 when this worker's waiter slots are full; the client
+    then falls back to GET /events.
+    """
+    app   = current_app._get_current_object()
+    after = request.headers.get("Last-Event-ID", type=int)
+    if after is None:
+        after = request.args.get("after", type=int)
+    with_occupancy = request.args.get("occupancy") == "1"
+    if not admin_events.acquire():
+        return jsonify({"error": "Too many open event streams", "retry_ms": RETRY_MS}), 503
+
+    def stream():
+        with app.app_context():
+            last     = after if after is not None else admin_events.last_id()
+            deadline = time.monotonic() + app.config["ADMIN_EVENTS_STREAM_SECONDS"]
+            recheck  = min(15, app.config["OCCUPANCY_RECONCILE_SECONDS"]) if with_occupancy else 15
+            seen     = None
+            yield "retry: 3000\n\n"
+            while time.monotonic() < deadline:
+                sent = False
+                if with_occupancy:
+                    snap = occupancy.snapshot()
+                    if snap["occupancy"] != seen:
+                        seen = snap["occupancy"]
+                        yield f"event: occupancy\ndata: {json.dumps(snap)}\n\n"
+                        sent = True
+                until  = _occupancy_changed(seen) if with_occupancy else None
+                events = admin_events.wait(last, min(recheck, max(deadline - time.monotonic(), 0)), until)
+                for ev in events:
+                    yield f"id: {ev['id']}\ndata: {json.dumps(ev)}\n\n"
+                    last = ev["id"]
+                if not (events or sent):
+                    yield ": keep-alive\n\n"
+
+    response = Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    response.call_on_close(admin_events.release)
+    return response
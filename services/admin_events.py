@@ -0,0 +1,163 @@
+"""
+Pending-approval event feed for admin dashboards.
+
+Kinds: subscription_requested (data is the pending-list row),
+payment_approved, payment_rejected and subscription_cancelled.
+
+The subscription routes call record() before committing, so an event
+exists exactly when its change does. On PostgreSQL record() also takes a
+transaction-level advisory lock, so recording transactions draw their ids
+and commit one at a time: an event never becomes visible after one with a
+higher id, and following the feed by "id > last seen" cannot skip it.
+(SQLite serialises writers already.) Dashboards follow the feed by id
+over server-sent events or long-polling (GET /api/payment/events) and
+patch their tables, instead of re-fetching the pending list and stats.
+The same connection also carries the live occupancy count
+(services/occupancy.py), so a dashboard needs only one.
+
+Waiters in this worker wake as soon as a recording session commits.
+Events from other workers are picked up by one poller thread per worker,
+which reads max(id) every POLL_SECONDS while anyone is waiting and wakes
+all waiters when it moves. Waiters only query for the events themselves.
+
+Every open stream or long-poll holds a request thread for its whole
+duration, so run the app with threaded or async workers: gunicorn.conf.py
+selects gthread, or use gevent. Under the default sync worker a single
+waiter blocks the whole worker. Each worker serves at most
+ADMIN_EVENTS_MAX_WAITERS of them at once. Beyond that, streams are refused
+with 503 and long-polls return immediately with retry_ms, so dashboards
+fall back to plain polling and cannot use up the worker pool.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import AdminEvent, now_ist
+
+POLL_SECONDS = 2
+BATCH_LIMIT  = 100
+# pg_advisory_xact_lock key that orders event inserts
+LOCK_KEY     = 0x41444D45
+
+_cond    = threading.Condition()
+_seq     = [0]      # bumped whenever waiters should re-check for events
+_waiters = [0]      # open streams and long-polls in this worker
+_poller  = [None]
+
+
+def record(kind, sub, **data):
+    """Add an event for `sub` to the current transaction."""
+    if db.session.get_bind().dialect.name == "postgresql":
+        db.session.execute(db.select(db.func.pg_advisory_xact_lock(LOCK_KEY)))
+    db.session.add(AdminEvent(kind=kind, subscription_id=sub.id, data=data))
+    db.session.info["admin_event_recorded"] = True
+
+
+def wake():
+    """Wake every waiter in this worker."""
+    with _cond:
+        _seq[0] += 1
+        _cond.notify_all()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_waiters(session):
+    if session.info.pop("admin_event_recorded", False):
+        wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session):
+    session.info.pop("admin_event_recorded", None)
+
+
+def _row_dict(row):
+    return {
+        "id":              row.id,
+        "kind":            row.kind,
+        "subscription_id": row.subscription_id,
+        "data":            row.data,
+        "created_at":      row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def last_id():
+    with db.engine.connect() as conn:
+        return conn.execute(db.select(db.func.max(AdminEvent.id))).scalar() or 0
+
+
+def since(after_id, limit=BATCH_LIMIT):
+    """Events with id > after_id, oldest first (own connection, no session held)."""
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            db.select(AdminEvent.__table__)
+            .where(AdminEvent.id > after_id)
+            .order_by(AdminEvent.id)
+            .limit(limit)
+        ).all()
+    return [_row_dict(r) for r in rows]
+
+
+def _poll(app):
+    known = None
+    while True:
+        with _cond:
+            _cond.wait_for(lambda: _waiters[0] > 0)
+        try:
+            with app.app_context():
+                newest = last_id()
+        except Exception as exc:
+            app.logger.warning(f"Admin event poll failed: {exc}")
+            newest = known
+        if known is not None and newest != known:
+            wake()
+        known = newest
+        time.sleep(POLL_SECONDS)
+
+
+def acquire():
+    """Reserve a waiter slot in this worker; False when ADMIN_EVENTS_MAX_WAITERS are open."""
+    app = current_app._get_current_object()
+    with _cond:
+        if _waiters[0] >= app.config["ADMIN_EVENTS_MAX_WAITERS"]:
+            return False
+        _waiters[0] += 1
+        if _poller[0] is None:
+            _poller[0] = threading.Thread(target=_poll, args=(app,), name="admin-events", daemon=True)
+            _poller[0].start()
+        _cond.notify_all()
+    return True
+
+
+def release():
+    with _cond:
+        _waiters[0] -= 1
+
+
+def wait(after_id, timeout, until=None):
+    """
+    Block up to `timeout` seconds for events after `after_id`. Returns []
+    on timeout, or early once `until()` is true after a wake-up.
+    Call between acquire() and release().
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        with _cond:
+            seen = _seq[0]
+        events = since(after_id)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0 or (until and until()):
+            return events
+        with _cond:
+            _cond.wait_for(lambda: _seq[0] != seen, remaining)
+
+
+def prune(days=7):
+    """Delete events older than `days`. Returns the number removed."""
+    cutoff = now_ist() - timedelta(days=days)
+    return db.session.execute(db.delete(AdminEvent).where(AdminEvent.created_at < cutoff)).rowcount
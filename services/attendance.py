@@ -0,0 +1,139 @@
+"""
+Gym door check-in / check-out, one statement each.
+
+The partial unique index uq_attendance_open (member_id WHERE
+check_out_time IS NULL) guarantees at most one open visit per member, so
+check-in is a single INSERT ... ON CONFLICT DO NOTHING RETURNING and two
+racing taps cannot both succeed. Check-out closes the open row with one
+UPDATE ... RETURNING.
+
+check_in_many() serves the front-desk batch endpoint: one validation
+query for the whole batch and one multi-row INSERT.
+
+Every check-in also sets the day's bit in the member's attendance_bitmap row.
+
+sweep_stale() closes visits members forgot to check out of, in one UPDATE.
+"""
+from datetime import date, datetime, timedelta
+
+from extensions import db
+from models import Attendance, Member, now_ist
+from services import attendance_bitmap
+
+
+def _insert():
+    if db.session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def check_in(member_id):
+    """Open a visit; returns the new Attendance, or None if one is already open."""
+    stmt = (
+        _insert()(Attendance)
+        .values(member_id=member_id)
+        .on_conflict_do_nothing(
+            index_elements=["member_id"],
+            index_where=Attendance.check_out_time.is_(None),
+        )
+        .returning(Attendance)
+    )
+    att = db.session.scalars(stmt).first()
+    if att is not None:
+        attendance_bitmap.mark([(member_id, att.check_in_time.date())])
+    return att
+
+
+def check_out(member_id):
+    """Close the open visit; returns it, or None if there was none."""
+    stmt = (
+        db.update(Attendance)
+        .where(Attendance.member_id == member_id, Attendance.check_out_time.is_(None))
+        .values(check_out_time=now_ist())
+        .returning(Attendance)
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.scalars(stmt).first()
+
+
+def check_in_many(member_ids):
+    """
+    Check in a batch of members. Returns one result per distinct id, in
+    input order, with status checked_in, already_checked_in,
+    no_active_subscription or not_found.
+    """
+    member_ids = list(dict.fromkeys(member_ids))
+    today = date.today()
+    state = {
+        row.user_id: row
+        for row in db.session.execute(
+            db.select(Member.user_id, Member.current_end_date, Attendance.id.label("open_id"))
+            .outerjoin(
+                Attendance,
+                db.and_(Attendance.member_id == Member.user_id, Attendance.check_out_time.is_(None)),
+            )
+            .where(Member.user_id.in_(member_ids))
+        )
+    }
+
+    results, to_insert = {}, []
+    for mid in member_ids:
+        row = state.get(mid)
+        if row is None:
+            results[mid] = {"member_id": mid, "status": "not_found"}
+        elif row.current_end_date is None or row.current_end_date < today:
+            results[mid] = {"member_id": mid, "status": "no_active_subscription"}
+        elif row.open_id is not None:
+            results[mid] = {"member_id": mid, "status": "already_checked_in"}
+        else:
+            to_insert.append({"member_id": mid, "check_in_time": now_ist()})
+
+    if to_insert:
+        stmt = (
+            _insert()(Attendance)
+            .on_conflict_do_nothing(
+                index_elements=["member_id"],
+                index_where=Attendance.check_out_time.is_(None),
+            )
+            .returning(Attendance)
+        )
+        inserted = db.session.scalars(stmt, to_insert).all()
+        for att in inserted:
+            results[att.member_id] = {
+                "member_id":  att.member_id,
+                "status":     "checked_in",
+                "attendance": att.to_dict(),
+            }
+        attendance_bitmap.mark([(att.member_id, att.check_in_time.date()) for att in inserted])
+        # Rows skipped by ON CONFLICT lost a race with another check-in.
+        for row in to_insert:
+            results.setdefault(row["member_id"], {"member_id": row["member_id"], "status": "already_checked_in"})
+
+    return [results[mid] for mid in member_ids]
+
+
+def stale_cutoff(max_hours=None, midnight=False):
+    """
+    Open visits that started before the returned (naive IST) time are stale:
+    either older than `max_hours`, or from before today's IST midnight.
+    """
+    now = now_ist().replace(tzinfo=None)
+    if midnight:
+        return datetime.combine(now.date(), datetime.min.time())
+    return now - timedelta(hours=max_hours)
+
+
+def sweep_stale(cutoff):
+    """
+    Close every open visit that started before `cutoff` as a zero-length,
+    auto_closed visit. Returns (rows closed, details) for jobs.run().
+    """
+    result = db.session.execute(
+        db.update(Attendance)
+        .where(Attendance.check_out_time.is_(None), Attendance.check_in_time < cutoff)
+        .values(check_out_time=Attendance.check_in_time, auto_closed=True)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount, {"cutoff": cutoff.isoformat()}
@@ -0,0 +1,114 @@
+"""
+Per-member attendance presence bitmaps (attendance_bitmap).
+
+Each row holds one bit per day of a year (46 bytes), set when the member
+checks in that IST day. Calendars and visit counts read one row per year
+and use popcount instead of scanning attendance.
+
+Bits are set in SQL with set_bit(bits, n, 1): built in on PostgreSQL,
+registered below as a Python function on SQLite connections.
+"""
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from extensions import db
+from models import Attendance, AttendanceBitmap
+
+YEAR_BYTES = 46   # 366 bits
+
+
+def _set_bit(bits, n, value):
+    buf = bytearray(bits or bytes(YEAR_BYTES))
+    if value:
+        buf[n // 8] |= 1 << (n % 8)
+    else:
+        buf[n // 8] &= ~(1 << (n % 8)) & 0xFF
+    return bytes(buf)
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_set_bit(dbapi_conn, _record):
+    if isinstance(dbapi_conn, sqlite3.Connection):
+        dbapi_conn.create_function("set_bit", 3, _set_bit, deterministic=True)
+
+
+def _bit(day):
+    return day.timetuple().tm_yday - 1
+
+
+def _insert():
+    if db.session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def mark(visits):
+    """Set the bit for every (member_id, day) pair, one upsert statement for all."""
+    rows = [
+        {"member_id": mid, "year": day.year, "bits": _set_bit(None, _bit(day), 1), "bit": _bit(day)}
+        for mid, day in visits
+    ]
+    if not rows:
+        return
+    stmt = _insert()(AttendanceBitmap)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["member_id", "year"],
+        set_={"bits": db.func.set_bit(AttendanceBitmap.bits, db.bindparam("bit", type_=db.Integer), 1)},
+    )
+    db.session.execute(stmt, rows)
+
+
+def _bitmaps(member_id, first_year, last_year):
+    return dict(db.session.execute(
+        db.select(AttendanceBitmap.year, AttendanceBitmap.bits)
+        .where(
+            AttendanceBitmap.member_id == member_id,
+            AttendanceBitmap.year.between(first_year, last_year),
+        )
+    ).all())
+
+
+def year_days(member_id, year):
+    """Sorted list of day-of-year indexes (0-based) the member visited in `year`."""
+    bits = _bitmaps(member_id, year, year).get(year)
+    if not bits:
+        return []
+    n = int.from_bytes(bits, "little")
+    return [i for i in range(YEAR_BYTES * 8) if n >> i & 1]
+
+
+def count_visits(member_id, start, end):
+    """Number of distinct days with a check-in between two dates (inclusive)."""
+    total = 0
+    for year, bits in _bitmaps(member_id, start.year, end.year).items():
+        lo = _bit(start) if year == start.year else 0
+        hi = _bit(end) if year == end.year else YEAR_BYTES * 8 - 1
+        mask = (1 << (hi + 1)) - (1 << lo)
+        total += (int.from_bytes(bits, "little") & mask).bit_count()
+    return total
+
+
+def rebuild(chunk_size=5000):
+    """Recreate every bitmap from attendance in one sorted pass. Returns row count."""
+    day  = db.func.date(Attendance.check_in_time, type_=db.Date)
+    rows = db.session.execute(
+        db.select(Attendance.member_id, day)
+        .group_by(Attendance.member_id, day)
+        .order_by(Attendance.member_id, day)
+        .execution_options(yield_per=chunk_size)
+    )
+    bitmaps = {}
+    for member_id, visit_day in rows:
+        buf = bitmaps.setdefault((member_id, visit_day.year), bytearray(YEAR_BYTES))
+        n = _bit(visit_day)
+        buf[n // 8] |= 1 << (n % 8)
+
+    db.session.execute(db.delete(AttendanceBitmap))
+    values = [{"member_id": m, "year": y, "bits": bytes(b)} for (m, y), b in bitmaps.items()]
+    for start in range(0, len(values), chunk_size):
+        db.session.execute(db.insert(AttendanceBitmap), values[start:start + chunk_size])
+    return len(values)
@@ -0,0 +1,137 @@
+"""
+Idempotent database bootstrap: schema, seed data and the one-off
+SQLite → PostgreSQL copy. Run it with `flask bootstrap` on deploy.
+
+Workers only compare the stamp in app_meta with BOOTSTRAP_VERSION (one
+primary-key read) and run the bootstrap themselves only when
+AUTO_BOOTSTRAP is enabled (the default for local SQLite).
+"""
+import os
+
+from flask_security import hash_password
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect as sa_inspect
+
+from extensions import db
+from models import AppMeta, Plan, Role
+
+# Bump when the seed data changes or a new migration must run on deploy.
+BOOTSTRAP_VERSION = "2026.10-6"
+STAMP_KEY = "bootstrap_version"
+
+ROLES = {
+    "member":      "Basic member access",
+    "lead":        "Team lead",
+    "admin":       "Administrator",
+    "super_admin": "Super administrator",
+}
+
+SAMPLE_PLANS = [
+    dict(name="Monthly",   duration_days=30,  price=999.0,  description="Full gym access for 1 month"),
+    dict(name="Quarterly", duration_days=90,  price=2499.0, description="Full gym access for 3 months"),
+    dict(name="Half Year", duration_days=180, price=4499.0, description="Full gym access for 6 months"),
+    dict(name="Annual",    duration_days=365, price=7999.0, description="Full gym access for 1 year"),
+]
+
+
+def stamped_version():
+    """The bootstrap version recorded in the database, or None."""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(
+                db.select(AppMeta.value).where(AppMeta.key == STAMP_KEY)
+            ).scalar()
+    except Exception:
+        return None
+
+
+def is_current():
+    return stamped_version() == BOOTSTRAP_VERSION
+
+
+def ensure_schema(log=print):
+    """create_all + stamp on an empty database, otherwise apply pending migrations."""
+    if not sa_inspect(db.engine).get_table_names():
+        log("No tables found — creating schema")
+        db.create_all()
+        stamp()
+    else:
+        upgrade()
+
+
+def run(app, log=print):
+    """Bring schema and seed data up to BOOTSTRAP_VERSION. Safe to re-run."""
+    ensure_schema(log)
+
+    # Copy first: seed rows would otherwise take the PKs and unique keys
+    # of the real SQLite rows and the copy would skip those.
+    if db.engine.dialect.name == "postgresql" and not migrate_sqlite_to_pg(app):
+        log("SQLite → PostgreSQL copy incomplete — version not stamped")
+        return
+    _seed(app)
+
+    meta = db.session.get(AppMeta, STAMP_KEY) or AppMeta(key=STAMP_KEY)
+    meta.value = BOOTSTRAP_VERSION
+    db.session.add(meta)
+    db.session.commit()
+    log(f"Bootstrap complete ({BOOTSTRAP_VERSION})")
+
+
+def _seed(app):
+    datastore = app.extensions["security"].datastore
+
+    existing = set(db.session.execute(db.select(Role.name)).scalars())
+    for name, description in ROLES.items():
+        if name not in existing:
+            datastore.create_role(name=name, description=description)
+
+    if not datastore.find_user(email="admin@msfitness.com"):
+        admin_role = datastore.find_role("admin")
+        datastore.create_user(
+            email="admin@msfitness.com",
+            password=hash_password("admin@123"),
+            roles=[admin_role],
+            username="admin",
+            phone="0000000000",
+        )
+
+    if not db.session.execute(db.select(Plan.id).limit(1)).first():
+        db.session.add_all([Plan(**p) for p in SAMPLE_PLANS])
+
+    db.session.commit()
+
+
+def migrate_sqlite_to_pg(app):
+    """
+    Copy the local SQLite db into PostgreSQL once (resumes a partial copy).
+    Returns False if a copy was attempted and failed.
+    """
+    from services import sqlite_to_pg
+
+    sqlite_path = os.path.join(app.instance_path, "db.sqlite3")
+    if not os.path.exists(sqlite_path):
+        return True
+
+    try:
+        state = sqlite_to_pg.status(db.engine)
+        if state == "done":
+            return True
+        if state is None:
+            with db.engine.connect() as conn:
+                pg_member_count = conn.execute(db.text("SELECT COUNT(*) FROM member")).scalar()
+            if pg_member_count:
+                app.logger.info("PostgreSQL already has data — skipping migration.")
+                return True
+    except Exception as exc:
+        app.logger.warning(f"Could not check PG migration state: {exc}")
+        return False
+
+    app.logger.info("Auto-migrating SQLite → PostgreSQL...")
+    try:
+        sqlite_to_pg.migrate(sqlite_path, db.engine, log=app.logger.info)
+        sqlite_to_pg.rebuild_derived()
+    except Exception as exc:
+        app.logger.error(f"  ✗ migration stopped, re-run `flask bootstrap` to resume: {exc}")
+        return False
+    app.logger.info("Migration complete!")
+    return True
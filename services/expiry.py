@@ -0,0 +1,44 @@
+"""
+Subscription expiry: flip approved subscriptions past their end_date from
+"active" to "expired", keeping the active set small for the partial index
+ix_subscription_active_end and every status = 'active' query.
+
+Runs as `flask expire-subscriptions` and from the in-process scheduler.
+The UPDATE is chunked by id and each chunk commits on its own, so a large
+backlog never holds long row locks. If a chunk fails, the number already
+committed is attached to the exception for the JobRun row (services/jobs.py).
+"""
+from datetime import date
+
+from extensions import db
+from models import Subscription
+
+CHUNK_SIZE = 1000
+
+
+def expire_lapsed(today=None, chunk_size=CHUNK_SIZE):
+    """Expire every active subscription that ended before `today`. Returns (count, details)."""
+    today = today or date.today()
+    total = 0
+    try:
+        while True:
+            ids = (
+                db.select(Subscription.id)
+                .where(Subscription.status == "active", Subscription.end_date < today)
+                .limit(chunk_size)
+                .scalar_subquery()
+            )
+            changed = db.session.execute(
+                db.update(Subscription)
+                .where(Subscription.id.in_(ids))
+                .values(status="expired")
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            total += changed
+            if changed < chunk_size:
+                break
+    except Exception as exc:
+        exc.rows_committed = total
+        raise
+    return total, {"before": today.isoformat()}
@@ -0,0 +1,51 @@
+"""
+Audit trail for maintenance jobs.
+
+run() executes a job function and commits its work together with a
+JobRun row recording who triggered it, when it ran, how many rows it
+touched and any details the job returns. A job that fails still gets
+its JobRun row, with the error in details. Jobs that commit in chunks
+(services/expiry.py) set `rows_committed` on the exception, so the row
+counts the chunks that did land.
+"""
+from extensions import db
+from models import JobRun, now_ist
+
+
+def run(job, triggered_by, fn, *args, **kwargs):
+    """
+    Call fn(*args, **kwargs) -> (rows_affected, details), record it and
+    commit. Returns the JobRun as a dict. Re-raises fn's exception after
+    committing a JobRun for the failed run.
+    """
+    started = now_ist()
+    try:
+        rows, details = fn(*args, **kwargs)
+    except Exception as exc:
+        db.session.rollback()
+        _record(job, triggered_by, started, getattr(exc, "rows_committed", 0), {"error": str(exc)})
+        raise
+    return _record(job, triggered_by, started, rows, details)
+
+
+def _record(job, triggered_by, started, rows, details):
+    run_row = JobRun(
+        job=job,
+        triggered_by=triggered_by,
+        started_at=started,
+        finished_at=now_ist(),
+        rows_affected=rows,
+        details=details,
+    )
+    db.session.add(run_row)
+    db.session.flush()
+    result = run_row.to_dict()
+    db.session.commit()
+    return result
+
+
+def recent(job=None, limit=50):
+    q = JobRun.query.order_by(JobRun.id.desc())
+    if job:
+        q = q.filter(JobRun.job == job)
+    return q.limit(limit).all()
@@ -0,0 +1,200 @@
+"""
+Bulk member import, used by POST /api/admin/members/import and
+`flask import-members`.
+
+Rows are validated up front. Username, phone and email clashes with
+existing users are found with one query. Passwords are hashed in a
+process pool (bcrypt is CPU-bound), and User, roles_users and Member
+rows are inserted in executemany batches inside a single transaction.
+Invalid rows are skipped and reported; the valid ones are still imported.
+"""
+import csv
+import io
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from flask import current_app
+from flask_security import hash_password
+
+from extensions import db
+from models import Member, Role, User, roles_users
+
+DEFAULT_PASSWORD = "ms@123"
+MAX_ROWS   = 5000
+BATCH_SIZE = 500
+# Below this many passwords a thread pool costs more to start than it saves.
+POOL_MIN_ROWS = 8
+
+
+def parse_csv(text):
+    """CSV with a header row (username, phone, password, email, name, ...) -> list of dicts."""
+    return [dict(r) for r in csv.DictReader(io.StringIO(text))]
+
+
+def _str(row, key):
+    return str(row.get(key) or "").strip()
+
+
+def _float(row, key):
+    val = row.get(key)
+    if val in (None, ""):
+        return None
+    return float(val)
+
+
+def _clean(row, default_password):
+    """Validated insert values for one row; raises ValueError with the reason."""
+    username = _str(row, "username")
+    phone    = _str(row, "phone")
+    if not username or not phone:
+        raise ValueError("username and phone are required")
+    try:
+        height_cm = _float(row, "height_cm")
+        weight_kg = _float(row, "weight_kg")
+    except (TypeError, ValueError):
+        raise ValueError("height_cm and weight_kg must be numbers")
+    dob = _str(row, "dob")
+    try:
+        dob = date.fromisoformat(dob) if dob else None
+    except ValueError:
+        raise ValueError("dob must be YYYY-MM-DD")
+    return {
+        "username":   username,
+        "phone":      phone,
+        "email":      _str(row, "email") or None,
+        "password":   str(row.get("password") or default_password),
+        "name":       _str(row, "name") or username,
+        "profession": _str(row, "profession") or None,
+        "height_cm":  height_cm,
+        "weight_kg":  weight_kg,
+        "dob":        dob,
+    }
+
+
+def _validate(rows, default_password):
+    results, valid = [], []
+    seen = {"username": set(), "phone": set(), "email": set()}
+    for i, row in enumerate(rows, start=1):
+        result = {"row": i, "username": _str(row, "username") or None}
+        results.append(result)
+        try:
+            clean = _clean(row, default_password)
+        except ValueError as exc:
+            result.update(status="error", error=str(exc))
+            continue
+        dup = next((f for f in seen if clean[f] and clean[f] in seen[f]), None)
+        if dup:
+            result.update(status="error", error=f"Duplicate {dup} in import")
+            continue
+        for field in seen:
+            if clean[field]:
+                seen[field].add(clean[field])
+        valid.append((result, clean))
+
+    if valid:
+        taken = db.session.execute(
+            db.select(User.username, User.phone, User.email).where(
+                db.or_(
+                    User.username.in_(seen["username"]),
+                    User.phone.in_(seen["phone"]),
+                    User.email.in_(seen["email"]),
+                )
+            )
+        ).all()
+        existing = {
+            "username": {t.username for t in taken},
+            "phone":    {t.phone for t in taken},
+            "email":    {t.email for t in taken if t.email},
+        }
+        still_valid = []
+        for result, clean in valid:
+            clash = next((f for f in existing if clean[f] and clean[f] in existing[f]), None)
+            if clash:
+                result.update(status="error", error=f"{clash.capitalize()} already taken")
+            else:
+                still_valid.append((result, clean))
+        valid = still_valid
+    return results, valid
+
+
+def hash_passwords(passwords):
+    """
+    flask_security.hash_password for each password, over one thread per
+    core. bcrypt releases the GIL while hashing, so the threads run in
+    parallel without forking the (threaded) web worker. Each task pushes
+    the app context, so the result follows the app's Flask-Security
+    configuration.
+    """
+    workers = os.cpu_count() or 1
+    if len(passwords) < POOL_MIN_ROWS or workers == 1:
+        return [hash_password(p) for p in passwords]
+
+    app = current_app._get_current_object()
+
+    def _hash(password):
+        with app.app_context():
+            return hash_password(password)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import-hash") as pool:
+        return list(pool.map(_hash, passwords))
+
+
+def import_members(rows, default_password=DEFAULT_PASSWORD):
+    """
+    Create a member account for every valid row. Commits once.
+    Returns {"created", "failed", "results"} with one result per input row.
+    """
+    results, valid = _validate(rows, default_password)
+    hashes = hash_passwords([clean["password"] for _, clean in valid])
+    member_role_id = db.session.execute(
+        db.select(Role.id).where(Role.name == "member")
+    ).scalar()
+
+    for start in range(0, len(valid), BATCH_SIZE):
+        batch = valid[start:start + BATCH_SIZE]
+        # RETURNING order is not guaranteed for batched inserts on every
+        # backend, so ids are matched back by (unique) username.
+        id_by_username = dict(db.session.execute(
+            db.insert(User).returning(User.username, User.id),
+            [
+                {
+                    "username":      clean["username"],
+                    "email":         clean["email"],
+                    "phone":         clean["phone"],
+                    "password":      pw_hash,
+                    "fs_uniquifier": uuid.uuid4().hex,
+                }
+                for (_, clean), pw_hash in zip(batch, hashes[start:start + BATCH_SIZE])
+            ],
+        ).all())
+        user_ids = [id_by_username[clean["username"]] for _, clean in batch]
+        if member_role_id:
+            db.session.execute(
+                roles_users.insert(),
+                [{"user_id": uid, "role_id": member_role_id} for uid in user_ids],
+            )
+        db.session.execute(
+            db.insert(Member),
+            [
+                {
+                    "user_id":    uid,
+                    "name":       clean["name"],
+                    "profession": clean["profession"],
+                    "height_cm":  clean["height_cm"],
+                    "weight_kg":  clean["weight_kg"],
+                    "dob":        clean["dob"],
+                }
+                for (_, clean), uid in zip(batch, user_ids)
+            ],
+        )
+        for (result, _), uid in zip(batch, user_ids):
+            result.update(status="created", user_id=uid)
+
+    db.session.commit()
+    return {
+        "created": len(valid),
+        "failed":  len(results) - len(valid),
+        "results": results,
+    }
@@ -0,0 +1,62 @@
+"""
+Live gym occupancy (members checked in and not yet out).
+
+Each worker keeps the last count read from the database plus the check-ins
+and check-outs it has committed since. The base is re-read at most every
+OCCUPANCY_RECONCILE_SECONDS, so changes made by other workers show up
+within that interval. That read is a count over the partial unique index
+uq_attendance_open (one entry per member in the gym), not a table scan,
+and there is no shared counter row for every check-in to contend on.
+
+Dashboards receive changes over the admin event feed (services/admin_events.py):
+adjust() wakes its waiters, and a waiter re-checks current() at least every
+OCCUPANCY_RECONCILE_SECONDS.
+"""
+import threading
+import time
+
+from flask import current_app
+from extensions import db
+from models import Attendance, now_ist
+from services import admin_events
+
+_lock  = threading.Lock()
+_state = {"base": None, "delta": 0, "read_at": 0.0}
+
+
+def _count_open():
+    with db.engine.connect() as conn:
+        return conn.execute(
+            db.select(db.func.count())
+            .select_from(Attendance)
+            .where(Attendance.check_out_time.is_(None))
+        ).scalar()
+
+
+def adjust(delta):
+    """Record `delta` committed check-ins (+) or check-outs (-) from this worker."""
+    if delta:
+        with _lock:
+            _state["delta"] += delta
+        admin_events.wake()
+
+
+def reconcile():
+    """Replace the cached value with a fresh count from the database."""
+    count = _count_open()
+    with _lock:
+        _state.update(base=count, delta=0, read_at=time.monotonic())
+    return count
+
+
+def current():
+    """People in the gym right now (at most OCCUPANCY_RECONCILE_SECONDS stale across workers)."""
+    ttl = current_app.config.get("OCCUPANCY_RECONCILE_SECONDS", 10)
+    with _lock:
+        if _state["base"] is not None and time.monotonic() - _state["read_at"] < ttl:
+            return max(_state["base"] + _state["delta"], 0)
+    return reconcile()
+
+
+def snapshot():
+    return {"occupancy": current(), "as_of": now_ist().isoformat()}
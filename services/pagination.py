@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Cursors are opaque, URL-safe tokens wrapping the sort key of the last row
+on a page. The leading sort column may be NULL (legacy rows); those rows
+sort last on every dialect and the cursor carries the NULL through. Totals for cursor mode come from a short-TTL count cache rather
+than a COUNT(*) on every request.
+"""
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from extensions import db
+
+_lock   = threading.Lock()
+_counts = {}
+
+
+def encode_cursor(*values):
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, *types):
+    """Decode a cursor into values of the given types; raises ValueError if malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(raw, list) or len(raw) != len(types) or None in raw[1:]:
+        raise ValueError("Invalid cursor")
+    try:
+        return [
+            None if v is None else datetime.fromisoformat(v) if t is datetime else t(v)
+            for v, t in zip(raw, types)
+        ]
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def keyset_order(columns):
+    """ORDER BY for keyset pages: (col1 DESC NULLS LAST, col2 DESC)."""
+    c1, c2 = columns
+    return [c1.desc().nulls_last(), c2.desc()]
+
+
+def keyset_after(q, columns, values):
+    """Filter q to rows strictly after `values` in keyset_order(columns)."""
+    (c1, c2), (v1, v2) = columns, values
+    if v1 is None:
+        return q.filter(c1.is_(None), c2 < v2)
+    return q.filter(db.or_(c1 < v1, db.and_(c1 == v1, c2 < v2), c1.is_(None)))
+
+
+def cached_count(key, q):
+    """COUNT for q, reused for COUNT_CACHE_TTL seconds per key."""
+    now = time.monotonic()
+    with _lock:
+        hit = _counts.get(key)
+        if hit and hit[1] > now:
+            return hit[0]
+    total = q.order_by(None).count()
+    with _lock:
+        if len(_counts) >= 512:
+            _counts.clear()
+        _counts[key] = (total, now + current_app.config.get("COUNT_CACHE_TTL", 60))
+    return total
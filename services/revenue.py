@@ -0,0 +1,91 @@
+"""
+Daily revenue rollup (revenue_daily).
+
+Every change of Transaction.status goes through transition(), which
+applies the delta to the (IST day, mode, plan) bucket inside the caller's
+transaction. backfill() rebuilds the whole table from history.
+"""
+from datetime import date
+
+from extensions import db
+from models import IST, RevenueDaily, Subscription, Transaction
+
+
+def transition(txn, new_status):
+    """Set txn.status and keep revenue_daily in step with it."""
+    old_status = txn.status
+    txn.status = new_status
+    if old_status == new_status:
+        return
+    if new_status == "completed":
+        _apply(txn, +1)
+    elif old_status == "completed":
+        _apply(txn, -1)
+
+
+def _bucket_day(txn):
+    ts = txn.transaction_date
+    if ts is None:
+        return date.today()
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(IST)
+    return ts.date()
+
+
+def _apply(txn, sign):
+    plan_id = txn.subscription.plan_id if txn.subscription else 0
+    values  = {
+        "day":       _bucket_day(txn),
+        "mode":      txn.mode,
+        "plan_id":   plan_id,
+        "amount":    sign * txn.amount,
+        "txn_count": sign,
+    }
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(RevenueDaily).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "mode", "plan_id"],
+        set_={
+            "amount":    RevenueDaily.amount + stmt.excluded.amount,
+            "txn_count": RevenueDaily.txn_count + stmt.excluded.txn_count,
+        },
+    )
+    db.session.execute(stmt)
+
+
+def backfill():
+    """Rebuild revenue_daily from every completed transaction. Returns row count."""
+    day = db.func.date(Transaction.transaction_date)
+    src = (
+        db.select(
+            day,
+            Transaction.mode,
+            db.func.coalesce(Subscription.plan_id, 0),
+            db.func.sum(Transaction.amount),
+            db.func.count(),
+        )
+        .outerjoin(Subscription, Transaction.subscription_id == Subscription.id)
+        .where(Transaction.status == "completed")
+        .group_by(day, Transaction.mode, db.func.coalesce(Subscription.plan_id, 0))
+    )
+    db.session.execute(db.delete(RevenueDaily))
+    db.session.execute(
+        db.insert(RevenueDaily).from_select(
+            ["day", "mode", "plan_id", "amount", "txn_count"], src
+        )
+    )
+    return db.session.query(RevenueDaily).count()
+
+
+def series(start, end):
+    """Rollup rows between two IST dates (inclusive), oldest first."""
+    return (
+        RevenueDaily.query
+        .filter(RevenueDaily.day.between(start, end))
+        .order_by(RevenueDaily.day, RevenueDaily.mode, RevenueDaily.plan_id)
+        .all()
+    )
@@ -0,0 +1,85 @@
+"""
+Minimal in-process scheduler for the maintenance jobs.
+
+Enabled with SCHEDULER_ENABLED=1 (a daemon thread started by create_app)
+or run in the foreground with `flask run-scheduler`. Every
+SCHEDULER_TICK_SECONDS it runs each job whose last JobRun is older than
+the job's interval. Because the check goes through job_run, several
+workers with the scheduler on mostly skip each other's runs, and every
+job is idempotent, so an occasional double run is harmless.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from extensions import db
+from models import JobRun, now_ist
+
+TRIGGER = "scheduler"
+
+
+def _expire(app):
+    from services import expiry
+    return expiry.expire_lapsed()
+
+
+def _sweep(app):
+    from services import attendance
+    cutoff = attendance.stale_cutoff(app.config["ATTENDANCE_MAX_VISIT_HOURS"])
+    return attendance.sweep_stale(cutoff)
+
+
+def _decay(app):
+    from services import streaks
+    return streaks.decay(), None
+
+
+def _prune(app):
+    from services import admin_events
+    return admin_events.prune(), None
+
+
+# (job name, interval, callable(app) -> (rows affected, details))
+JOBS = [
+    ("subscription_expiry", timedelta(hours=1),  _expire),
+    ("attendance_sweep",    timedelta(hours=1),  _sweep),
+    ("streak_decay",        timedelta(hours=24), _decay),
+    ("admin_event_prune",   timedelta(hours=24), _prune),
+]
+
+
+def _due(job, interval):
+    last = db.session.execute(
+        db.select(db.func.max(JobRun.started_at)).where(JobRun.job == job)
+    ).scalar()
+    return last is None or last <= now_ist().replace(tzinfo=None) - interval
+
+
+def run_due(app, log=None):
+    """Run every job that is due; jobs.run commits each one."""
+    from services import jobs
+    for name, interval, fn in JOBS:
+        try:
+            if not _due(name, interval):
+                continue
+            run = jobs.run(name, TRIGGER, fn, app)
+            if log:
+                log(f"{name}: {run['rows_affected']} rows")
+        except Exception as exc:
+            db.session.rollback()
+            app.logger.error(f"Scheduled job {name} failed: {exc}")
+
+
+def loop(app, log=None):
+    tick = app.config["SCHEDULER_TICK_SECONDS"]
+    while True:
+        with app.app_context():
+            run_due(app, log)
+        time.sleep(tick)
+
+
+def start(app):
+    """Start the scheduler in a daemon thread of this process."""
+    thread = threading.Thread(target=loop, args=(app,), name="scheduler", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,74 @@
+"""
+Indexed member search over name, username and phone.
+
+PostgreSQL: pg_trgm GIN indexes serve the ILIKE '%q%' filters and
+similarity() ranks the matches.
+SQLite: a trigram FTS5 shadow table (member_search, rowid = member.user_id)
+is kept in sync by triggers and ranked with bm25.
+
+Both are installed by migration 0005_member_search_index on existing
+databases and by the after_create hook below on fresh ones, from the DDL
+in services/search_ddl.py.
+"""
+from sqlalchemy import event
+from extensions import db
+from models import Member, User
+from services import search_ddl
+
+# FTS5 trigram tokenizer needs SQLite 3.34+ and matches substrings of 3+ chars.
+FTS_MIN_CHARS = 3
+
+
+@event.listens_for(Member.__table__, "after_create")
+def _install_on_create(target, connection, **kw):
+    search_ddl.install(connection)
+
+
+_fts_ready = set()   # engine URLs known to have member_search
+
+
+def _has_fts():
+    # Only a positive probe is cached, so search switches to FTS as soon
+    # as the migration creates the table, without a restart.
+    engine = db.engine
+    if engine.url not in _fts_ready:
+        if not db.inspect(engine).has_table("member_search"):
+            return False
+        _fts_ready.add(engine.url)
+    return True
+
+
+def filter_members(q, term):
+    """
+    Restrict a Member ⋈ User query to rows matching `term`.
+    Returns (query, rank) where rank is an ORDER BY expression (best first),
+    or None when the backend cannot rank this term.
+    """
+    dialect = db.engine.dialect.name
+    like    = f"%{term}%"
+
+    if dialect == "sqlite" and len(term) >= FTS_MIN_CHARS and _has_fts():
+        match = '"' + term.replace('"', '""') + '"'
+        hits = (
+            db.select(db.literal_column("rowid").label("member_id"), db.literal_column("rank").label("rank"))
+            .select_from(db.table("member_search"))
+            .where(db.text("member_search MATCH :match").bindparams(match=match))
+            .subquery()
+        )
+        return q.join(hits, hits.c.member_id == Member.user_id), hits.c.rank.asc()
+
+    q = q.filter(
+        db.or_(
+            User.username.ilike(like),
+            Member.name.ilike(like),
+            User.phone.ilike(like),
+        )
+    )
+    if dialect == "postgresql":
+        rank = db.func.greatest(
+            db.func.similarity(Member.name, term),
+            db.func.similarity(User.username, term),
+            db.func.similarity(User.phone, term),
+        )
+        return q, rank.desc()
+    return q, None
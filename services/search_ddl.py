@@ -0,0 +1,52 @@
+"""
+DDL for the member search index, shared by services/search.py (fresh
+databases, `flask rebuild-search-index`) and migration
+0005_member_search_index. Kept free of app and model imports so the
+migration does not depend on the current models.
+"""
+import sqlite3
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS member_search
+       USING fts5(name, username, phone, tokenize = 'trigram')""",
+    """CREATE TRIGGER IF NOT EXISTS member_search_ai AFTER INSERT ON member BEGIN
+         INSERT INTO member_search (rowid, name, username, phone)
+         SELECT new.user_id, new.name, u.username, u.phone FROM user u WHERE u.id = new.user_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS member_search_au AFTER UPDATE OF name ON member BEGIN
+         UPDATE member_search SET name = new.name WHERE rowid = new.user_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS member_search_ad AFTER DELETE ON member BEGIN
+         DELETE FROM member_search WHERE rowid = old.user_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS member_search_user_au AFTER UPDATE OF username, phone ON user BEGIN
+         UPDATE member_search SET username = new.username, phone = new.phone WHERE rowid = new.id;
+       END""",
+]
+
+SQLITE_REBUILD = [
+    "DELETE FROM member_search",
+    """INSERT INTO member_search (rowid, name, username, phone)
+       SELECT m.user_id, m.name, u.username, u.phone FROM member m JOIN user u ON u.id = m.user_id""",
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_member_name_trgm ON member USING gin (name gin_trgm_ops)",
+    'CREATE INDEX IF NOT EXISTS ix_user_username_trgm ON "user" USING gin (username gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_user_phone_trgm ON "user" USING gin (phone gin_trgm_ops)',
+]
+
+
+def sqlite_fts_supported():
+    return sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def install(conn):
+    """Create the dialect's search structures on `conn` (idempotent)."""
+    if conn.dialect.name == "postgresql":
+        for stmt in POSTGRES_DDL:
+            conn.exec_driver_sql(stmt)
+    elif conn.dialect.name == "sqlite" and sqlite_fts_supported():
+        for stmt in SQLITE_DDL + SQLITE_REBUILD:
+            conn.exec_driver_sql(stmt)
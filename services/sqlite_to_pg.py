@@ -0,0 +1,147 @@
+"""
+Streaming SQLite → PostgreSQL copy, shared by `flask bootstrap`
+(services/bootstrap.py) and the migrate_to_pg.py script.
+
+- Tables come from the model metadata in foreign-key order.
+- Rows are read through the model Table objects, so SQLite's loose
+  typing (0/1 booleans, ISO date strings) is converted to Python values,
+  and streamed in chunks of `chunk_size`.
+- Each chunk is written with one executemany INSERT ... ON CONFLICT DO
+  NOTHING. The table's progress (last copied SQLite rowid) is saved in
+  the same target transaction, so an interrupted run resumes where it
+  stopped.
+- PostgreSQL sequences are moved past the copied ids at the end.
+"""
+import os
+
+from sqlalchemy import create_engine, inspect
+
+from extensions import db
+
+PROGRESS_TABLE = "_sqlite_migration_progress"
+
+_progress_md = db.MetaData()
+progress = db.Table(
+    PROGRESS_TABLE, _progress_md,
+    db.Column("table_name", db.String(255), primary_key=True),
+    db.Column("last_rowid", db.BigInteger, nullable=False, default=0),
+    db.Column("rows_copied", db.BigInteger, nullable=False, default=0),
+    db.Column("done", db.Boolean, nullable=False, default=False),
+)
+
+
+def _insert(dialect_name):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def status(target):
+    """None if no copy was ever started on `target`, else 'partial' or 'done'."""
+    if PROGRESS_TABLE not in inspect(target).get_table_names():
+        return None
+    with target.connect() as conn:
+        rows = conn.execute(db.select(progress.c.done)).scalars().all()
+    if not rows:
+        return None
+    return "done" if all(rows) else "partial"
+
+
+def migrate(sqlite_path, target, metadata=None, chunk_size=5000, log=print):
+    """Copy every model table from the SQLite file at `sqlite_path` into `target`."""
+    if not os.path.exists(sqlite_path):
+        raise FileNotFoundError(sqlite_path)
+
+    metadata = metadata if metadata is not None else db.metadata
+    source   = create_engine(f"sqlite:///{sqlite_path}")
+    src_insp = inspect(source)
+    src_tables = set(src_insp.get_table_names())
+    insert   = _insert(target.dialect.name)
+
+    _progress_md.create_all(target)
+
+    try:
+        for table in metadata.sorted_tables:
+            if table.name not in src_tables:
+                log(f"  - {table.name}: not in source, skipped")
+                continue
+            _copy_table(source, target, table, src_insp, insert, chunk_size, log)
+        if target.dialect.name == "postgresql":
+            _reset_sequences(target, metadata)
+    finally:
+        source.dispose()
+
+
+def _copy_table(source, target, table, src_insp, insert, chunk_size, log):
+    with target.connect() as conn:
+        state = conn.execute(
+            db.select(progress).where(progress.c.table_name == table.name)
+        ).first()
+    if state and state.done:
+        log(f"  ✓ {table.name}: already copied ({state.rows_copied} rows)")
+        return
+    last_rowid = state.last_rowid if state else 0
+    copied     = state.rows_copied if state else 0
+
+    src_cols = {c["name"] for c in src_insp.get_columns(table.name)}
+    # Columns closing a FK cycle (use_alter) point at tables copied later;
+    # they are left NULL here and rebuilt from the copied data afterwards.
+    columns = [
+        c for c in table.columns
+        if c.name in src_cols and not any(fk.use_alter for fk in c.foreign_keys)
+    ]
+    rowid = db.literal_column("rowid")
+
+    with source.connect() as src:
+        total = src.execute(db.select(db.func.count()).select_from(table)).scalar()
+        result = src.execution_options(yield_per=chunk_size).execute(
+            db.select(rowid.label("_rowid"), *columns)
+            .select_from(table)
+            .where(rowid > last_rowid)
+            .order_by(rowid)
+        )
+        stmt = insert(table).on_conflict_do_nothing()
+        for chunk in result.partitions():
+            rows = [{c.key: row[i + 1] for i, c in enumerate(columns)} for row in chunk]
+            last_rowid = chunk[-1][0]
+            copied    += len(rows)
+            with target.begin() as conn:
+                conn.execute(stmt, rows)
+                _save_progress(conn, table.name, last_rowid, copied, done=False)
+            log(f"  … {table.name}: {copied}/{total} rows")
+
+    with target.begin() as conn:
+        _save_progress(conn, table.name, last_rowid, copied, done=True)
+    log(f"  ✓ {table.name}: {copied} rows")
+
+
+def _save_progress(conn, table_name, last_rowid, copied, done):
+    values = {"last_rowid": last_rowid, "rows_copied": copied, "done": done}
+    updated = conn.execute(
+        db.update(progress).where(progress.c.table_name == table_name).values(**values)
+    ).rowcount
+    if not updated:
+        conn.execute(db.insert(progress).values(table_name=table_name, **values))
+
+
+def _reset_sequences(target, metadata):
+    with target.begin() as conn:
+        for table in metadata.sorted_tables:
+            pk = list(table.primary_key.columns)
+            if len(pk) != 1 or not isinstance(pk[0].type, db.Integer) or pk[0].autoincrement is False:
+                continue
+            name, col = table.name, pk[0].name
+            conn.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('\"{name}\"', '{col}'), "
+                f"COALESCE((SELECT MAX(\"{col}\") FROM \"{name}\"), 1), "
+                f"(SELECT MAX(\"{col}\") FROM \"{name}\") IS NOT NULL)"
+            )
+
+
+def rebuild_derived():
+    """Recompute data skipped by the copy (FK-cycle columns) in the app database."""
+    from models import Member
+    Member.rebuild_membership_snapshots()
+    db.session.commit()
@@ -0,0 +1,78 @@
+"""
+Dashboard KPIs shared by /api/admin/stats and /api/payment/stats.
+
+All figures come from one query (indexed subscription counts plus sums
+over the revenue_daily rollup) and are served from a short-TTL in-process
+cache. Routes that change subscription or payment state call
+invalidate() after committing.
+"""
+import threading
+import time
+from datetime import date, timedelta
+
+from flask import current_app
+from extensions import db
+from models import Member, RevenueDaily, Subscription, now_ist
+
+_lock  = threading.Lock()
+_cache = {"value": None, "expires": 0.0}
+
+
+def invalidate():
+    with _lock:
+        _cache["value"] = None
+        _cache["expires"] = 0.0
+
+
+def get_dashboard_stats():
+    """Return the KPI dict, recomputing it at most once per STATS_CACHE_TTL seconds."""
+    now = time.monotonic()
+    with _lock:
+        if _cache["value"] is not None and now < _cache["expires"]:
+            return dict(_cache["value"])
+
+    value = _compute()
+    ttl   = current_app.config.get("STATS_CACHE_TTL", 30)
+    with _lock:
+        _cache["value"] = value
+        _cache["expires"] = time.monotonic() + ttl
+    return dict(value)
+
+
+def dashboard_query():
+    """The single aggregate statement behind the KPIs (also used by explain_queries.py)."""
+    today = date.today()
+
+    def subscriptions(*where):
+        return db.select(db.func.count()).select_from(Subscription).where(*where).scalar_subquery()
+
+    # Subscription counts, as before the member snapshot: each one is an
+    # index range scan (ix_subscription_status_created, ix_subscription_active_end).
+    active = Subscription.status == "active"
+    counts = db.select(
+        db.select(db.func.count()).select_from(Member).scalar_subquery().label("total_members"),
+        subscriptions(active, Subscription.end_date >= today).label("active"),
+        subscriptions(Subscription.status == "pending").label("pending"),
+        subscriptions(active, Subscription.end_date.between(today, today + timedelta(days=7))).label("expiring"),
+    ).subquery()
+
+    revenue = db.select(
+        db.func.sum(RevenueDaily.amount).label("total"),
+        db.func.sum(db.case(
+            (RevenueDaily.day >= now_ist().date().replace(day=1), RevenueDaily.amount), else_=0,
+        )).label("month"),
+    ).subquery()
+
+    return db.select(counts, revenue).select_from(counts).join(revenue, db.true())
+
+
+def _compute():
+    row = db.session.execute(dashboard_query()).one()
+    return {
+        "total_members":        row.total_members or 0,
+        "active_subscriptions": int(row.active or 0),
+        "pending_approvals":    int(row.pending or 0),
+        "expiring_soon":        int(row.expiring or 0),
+        "total_revenue":        round(float(row.total or 0), 2),
+        "month_revenue":        round(float(row.month or 0), 2),
+    }
@@ -0,0 +1,71 @@
+"""
+Attendance streak maintenance.
+
+Checkout advances Member.streak from Member.last_visit_date with a single
+UPDATE (Member.record_visit). This module holds the batch jobs:
+
+- recompute(): rebuild every streak from the attendance table in one
+  ordered, streamed pass over (member, visit day). Like the checkout
+  path, it counts only visits the member checked out of; visits closed
+  by the attendance sweeper (auto_closed) never advance a streak.
+- decay(): zero the streak of members whose last visit was before
+  yesterday. Run nightly (`flask decay-streaks`).
+"""
+from datetime import timedelta
+
+from extensions import db
+from models import Attendance, Member, now_ist
+
+CHUNK_SIZE = 5000
+
+
+def _streak_floor():
+    """Oldest last_visit_date that still keeps a streak alive (yesterday, IST)."""
+    return now_ist().date() - timedelta(days=1)
+
+
+def recompute(chunk_size=CHUNK_SIZE):
+    """Rebuild streak and last_visit_date for all members. Returns members with a visit."""
+    day = db.func.date(Attendance.check_in_time, type_=db.Date)
+    rows = db.session.execute(
+        db.select(Attendance.member_id, day)
+        .where(Attendance.check_out_time.isnot(None), Attendance.auto_closed.is_(False))
+        .group_by(Attendance.member_id, day)
+        .order_by(Attendance.member_id, day)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    floor   = _streak_floor()
+    updates = []
+    current, last, run = None, None, 0
+    for member_id, visit_day in rows:
+        if member_id != current:
+            if current is not None:
+                updates.append(_row(current, last, run, floor))
+            current, last, run = member_id, None, 0
+        run  = run + 1 if last is not None and visit_day - last == timedelta(days=1) else 1
+        last = visit_day
+    if current is not None:
+        updates.append(_row(current, last, run, floor))
+
+    db.session.execute(db.update(Member).values(streak=0, last_visit_date=None))
+    for start in range(0, len(updates), chunk_size):
+        db.session.execute(db.update(Member), updates[start:start + chunk_size])
+    return len(updates)
+
+
+def _row(member_id, last, run, floor):
+    return {"user_id": member_id, "last_visit_date": last, "streak": run if last >= floor else 0}
+
+
+def decay():
+    """Reset streaks broken by a missed day. Returns the number of members reset."""
+    result = db.session.execute(
+        db.update(Member)
+        .where(
+            Member.streak > 0,
+            db.or_(Member.last_visit_date.is_(None), Member.last_visit_date < _streak_floor()),
+        )
+        .values(streak=0)
+    )
+    return result.rowcount
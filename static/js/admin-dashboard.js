@@ -21,15 +21,21 @@ async function loadStats() {
   } catch {}
 }
 
-async function loadPending() {
-  try {
-    const rows = await api('/api/payment/pending');
-    const tbody = document.getElementById('pending-tbody');
-    if (!rows.length) {
-      tbody.innerHTML = '<tr><td colspan="6" class="table-empty">No pending approvals 🎉</td></tr>';
-      return;
-    }
-    tbody.innerHTML = rows.map(r => `<tr>
+/* ── Live occupancy (carried by the admin event feed) ───────────────────────── */
+function showOccupancy(d) {
+  document.getElementById('stat-occupancy').textContent = d.occupancy;
+}
+
+const pendingRows = new Map();   // subscription id → pending row, patched by the event feed
+
+function renderPending() {
+  const tbody = document.getElementById('pending-tbody');
+  const rows  = [...pendingRows.values()];
+  if (!rows.length) {
+    tbody.innerHTML = '<tr><td colspan="6" class="table-empty">No pending approvals 🎉</td></tr>';
+    return;
+  }
+  tbody.innerHTML = rows.map(r => `<tr>
       <td><strong style="color:var(--white);">${r.member_name}</strong><br><span style="font-size:0.78rem;color:var(--steel);">@${r.member_username}</span></td>
       <td>${r.plan_name}</td>
       <td style="color:var(--fire);font-weight:700;">${fmtMoney(r.amount)}</td>
@@ -42,9 +48,32 @@ async function loadPending() {
         </div>
       </td>
     </tr>`).join('');
+}
+
+async function loadPending() {
+  try {
+    const rows = await api('/api/payment/pending');
+    pendingRows.clear();
+    rows.forEach(r => pendingRows.set(r.id, r));
+    renderPending();
   } catch(e) { toast('Failed to load pending: ' + e.message, 'error'); }
 }
 
+function onAdminEvent(ev) {
+  const count = document.getElementById('stat-pending');
+  const n     = parseInt(count?.textContent, 10);
+  if (ev.kind === 'subscription_requested') {
+    if (pendingRows.has(ev.data.id)) return;
+    pendingRows.set(ev.data.id, ev.data);
+    if (!isNaN(n)) setPendingCount('stat-pending', n + 1);
+  } else {
+    if (!pendingRows.delete(ev.subscription_id)) return;
+    if (!isNaN(n)) setPendingCount('stat-pending', Math.max(n - 1, 0));
+    if (ev.kind === 'payment_approved') loadStats();
+  }
+  renderPending();
+}
+
 async function loadExpiring() {
   try {
     // Fetch members and filter by expiring subscription
@@ -98,7 +127,9 @@ document.getElementById('approve-modal-confirm')?.addEventListener('click', asyn
     const res = await api(`/api/payment/approve/${pendingSubId}`, { method: 'POST', body: JSON.stringify({}) });
     closeModal('approve-modal');
     toast(res.message || 'Payment approved!');
-    await Promise.all([loadStats(), loadPending(), loadExpiring()]);
+    pendingRows.delete(pendingSubId);
+    renderPending();
+    await Promise.all([loadStats(), loadExpiring()]);
   } catch(e) { toast(e.message, 'error'); }
   finally { btn.classList.remove('btn-loading'); }
 });
@@ -121,7 +152,9 @@ document.getElementById('reject-modal-confirm')?.addEventListener('click', async
     await api(`/api/payment/reject/${rejectSubId}`, { method: 'POST', body: JSON.stringify({ notes }) });
     closeModal('reject-modal');
     toast('Payment rejected', 'warn');
-    await Promise.all([loadStats(), loadPending()]);
+    pendingRows.delete(rejectSubId);
+    renderPending();
+    await loadStats();
   } catch(e) { toast(e.message, 'error'); }
   finally { btn.classList.remove('btn-loading'); }
 });
@@ -136,4 +169,5 @@ window.openReject  = openReject;
 
 loadStats();
 loadPending();
-loadExpiring();
\ No newline at end of file
+loadExpiring();
+followAdminEvents(onAdminEvent, showOccupancy);
\ No newline at end of file
@@ -13,15 +13,16 @@ async function loadStats() {
   } catch {}
 }
 
-async function loadPending() {
-  try {
-    const rows = await api('/api/payment/pending');
-    const tbody = document.getElementById('pending-payments-tbody');
-    if (!rows.length) {
-      tbody.innerHTML = '<tr><td colspan="6" class="table-empty">No pending approvals 🎉</td></tr>';
-      return;
-    }
-    tbody.innerHTML = rows.map(r => `<tr>
+const pendingRows = new Map();   // subscription id → pending row, patched by the event feed
+
+function renderPending() {
+  const tbody = document.getElementById('pending-payments-tbody');
+  const rows  = [...pendingRows.values()];
+  if (!rows.length) {
+    tbody.innerHTML = '<tr><td colspan="6" class="table-empty">No pending approvals 🎉</td></tr>';
+    return;
+  }
+  tbody.innerHTML = rows.map(r => `<tr>
       <td><strong style="color:var(--white);">${r.member_name}</strong><br><span style="font-size:0.78rem;color:var(--steel);">@${r.member_username}</span></td>
       <td>${r.plan_name}</td>
       <td style="color:var(--fire);font-weight:700;">${fmtMoney(r.amount)}</td>
@@ -34,9 +35,33 @@ async function loadPending() {
         </div>
       </td>
     </tr>`).join('');
+}
+
+async function loadPending() {
+  try {
+    const rows = await api('/api/payment/pending');
+    pendingRows.clear();
+    rows.forEach(r => pendingRows.set(r.id, r));
+    renderPending();
   } catch(e) { toast('Failed to load pending: ' + e.message, 'error'); }
 }
 
+function onAdminEvent(ev) {
+  const count = document.getElementById('ps-pending');
+  const n     = parseInt(count?.textContent, 10);
+  if (ev.kind === 'subscription_requested') {
+    if (pendingRows.has(ev.data.id)) return;
+    pendingRows.set(ev.data.id, ev.data);
+    if (!isNaN(n)) setPendingCount('ps-pending', n + 1);
+  } else {
+    if (!pendingRows.delete(ev.subscription_id)) return;
+    if (!isNaN(n)) setPendingCount('ps-pending', Math.max(n - 1, 0));
+    if (ev.kind === 'payment_approved') loadStats();
+  }
+  renderPending();
+  loadHistory(txnPage);
+}
+
 async function loadHistory(page = 1) {
   const status = document.getElementById('status-filter').value;
   try {
@@ -97,7 +122,9 @@ document.getElementById('approve-confirm')?.addEventListener('click', async () =
     const res = await api(`/api/payment/approve/${pendingSubId}`, { method: 'POST', body: JSON.stringify({}) });
     closeModal('approve-modal');
     toast(res.message || 'Approved!');
-    await Promise.all([loadStats(), loadPending(), loadHistory(txnPage)]);
+    pendingRows.delete(pendingSubId);
+    renderPending();
+    await Promise.all([loadStats(), loadHistory(txnPage)]);
   } catch(e) { toast(e.message, 'error'); }
   finally { btn.classList.remove('btn-loading'); }
 });
@@ -119,7 +146,9 @@ document.getElementById('reject-confirm')?.addEventListener('click', async () =>
     await api(`/api/payment/reject/${rejectSubId}`, { method: 'POST', body: JSON.stringify({ notes }) });
     closeModal('reject-modal');
     toast('Rejected', 'warn');
-    await Promise.all([loadStats(), loadPending(), loadHistory(txnPage)]);
+    pendingRows.delete(rejectSubId);
+    renderPending();
+    await Promise.all([loadStats(), loadHistory(txnPage)]);
   } catch(e) { toast(e.message, 'error'); }
   finally { btn.classList.remove('btn-loading'); }
 });
@@ -132,4 +161,5 @@ window.openReject  = openReject;
 
 loadStats();
 loadPending();
-loadHistory(1);
\ No newline at end of file
+loadHistory(1);
+followAdminEvents(onAdminEvent);
\ No newline at end of file
@@ -84,4 +84,50 @@ async function updatePendingBadge() {
     }
   } catch {}
 }
-updatePendingBadge();
\ No newline at end of file
+updatePendingBadge();
+
+/* ── Admin event feed + occupancy (SSE, long-poll fallback) ─────────────────── */
+function followAdminEvents(onEvent, onOccupancy) {
+  let after = null, occupancy = '';
+  const poll = async () => {
+    try {
+      const params = new URLSearchParams();
+      if (after !== null) params.set('after', after);
+      if (onOccupancy) params.set('occupancy', occupancy);
+      const d = await api(`/api/payment/events?${params}`);
+      after = d.last_id;
+      d.events.forEach(onEvent);
+      if (onOccupancy && d.occupancy !== undefined && String(d.occupancy) !== occupancy) {
+        occupancy = String(d.occupancy);
+        onOccupancy(d);
+      }
+      setTimeout(poll, d.retry_ms || 0);
+    } catch { setTimeout(poll, 5000); }
+  };
+  if (!window.EventSource) return poll();
+
+  const es = new EventSource('/api/payment/events/stream' + (onOccupancy ? '?occupancy=1' : ''));
+  es.onmessage = e => {
+    const ev = JSON.parse(e.data);
+    after = ev.id;
+    onEvent(ev);
+  };
+  if (onOccupancy) {
+    es.addEventListener('occupancy', e => {
+      const d = JSON.parse(e.data);
+      occupancy = String(d.occupancy);
+      onOccupancy(d);
+    });
+  }
+  // Refused (503) or otherwise given up on by the browser: long-poll instead
+  es.onerror = () => { if (es.readyState === EventSource.CLOSED) poll(); };
+}
+
+function setPendingCount(id, n) {
+  const el = document.getElementById(id);
+  if (el) el.textContent = n;
+  const badge = document.getElementById('pending-badge');
+  if (!badge) return;
+  badge.textContent = n;
+  badge.classList.toggle('visible', n > 0);
+}